@@ -4,21 +4,29 @@
 main module;
 '''
 
+from argparse import ArgumentParser
 from curses import wrapper
+from itertools import islice
 from threading import Condition
 import curses
 import locale
 import mpd
+import os
 import select
 import signal
 import sys
+import time
 
 from ncmpy.config import conf
+from ncmpy.config import load_conf
+from ncmpy.fleet import connection_errors
+from ncmpy.fleet import servers_from_conf
 from ncmpy.keysym import keysym as ks
 from ncmpy.keysym import keysymgrp as ksg
 from ncmpy.pane import ArtistAlbumPane
 from ncmpy.pane import BarPane
 from ncmpy.pane import DatabasePane
+from ncmpy.pane import FleetPane
 from ncmpy.pane import HelpPane
 from ncmpy.pane import InfoPane
 from ncmpy.pane import LinePane
@@ -26,11 +34,14 @@ from ncmpy.pane import LyricsPane
 from ncmpy.pane import MenuPane
 from ncmpy.pane import MessagePane
 from ncmpy.pane import OutputPane
+from ncmpy.pane import PlaylistPane
 from ncmpy.pane import ProgressPane
 from ncmpy.pane import QueuePane
 from ncmpy.pane import SearchPane
 from ncmpy.pane import StatusPane
 from ncmpy.thread import LyricsThread
+from ncmpy.util import read_playlist
+from ncmpy.util import send_commands
 
 class Ncmpy():
 
@@ -38,16 +49,30 @@ class Ncmpy():
     main class;
     '''
 
-    def _init_mpd(self, host, port):
+    def _init_mpd(self):
 
-        ##  connect to mpd;
-        self.mpc = mpd.MPDClient()
-        self.mpc.connect(host, port)
+        ##  connect to mpd servers; servers other than the current one are
+        ##  watched in idle state, and may be down;
+        self.servers = servers_from_conf(conf)
+        self.servers[0].connect()
+        for server in self.servers[1:]:
+            if server.try_connect():
+                server.enter_idle()
+        self._use_server(self.servers[0])
 
-        ##  fetch server status;
-        self.status = self.mpc.status()
-        self.stats = self.mpc.stats()
-        self.currentsong = self.mpc.currentsong()
+    def _use_server(self, server):
+
+        '''
+        make a server current, using its cached state;
+        '''
+
+        self.cserver = server
+        self.mpc = server.mpc
+        self.idle = server.idle
+        self.status = server.status
+        self.stats = server.stats
+        self.currentsong = server.currentsong
+        self.ratings = server.ratings
 
     def _init_curses(self, stdscr):
 
@@ -67,75 +92,151 @@ class Ncmpy():
         self.stdscr = stdscr
         self.height, self.width = self.stdscr.getmaxyx()
 
+    def _newwin(self, nlines, ncols, begin_y, begin_x):
+
+        '''
+        create a new window;
+        '''
+
+        return curses.newwin(nlines, ncols, begin_y, begin_x)
+
     def _init_panes(self):
 
-        ##  create panes;
+        ##  create bar panes;
         self.menu_pane = MenuPane(
             'Menu',
-            curses.newwin(1, self.width, 0, 0), self)
+            self._newwin(1, self.width, 0, 0), self)
         self.line_pane = LinePane(
             'Line',
-            curses.newwin(1, self.width, 1, 0), self)
+            self._newwin(1, self.width, 1, 0), self)
         self.progress_pane = ProgressPane(
             'Progress',
-            curses.newwin(1, self.width, self.height - 2, 0), self)
+            self._newwin(1, self.width, self.height - 2, 0), self)
         self.status_pane = StatusPane(
             'Status',
-            curses.newwin(1, self.width, self.height - 1, 0), self)
+            self._newwin(1, self.width, self.height - 1, 0), self)
         self.message_pane = MessagePane(
             'Message',
-            curses.newwin(1, self.width, self.height - 1, 0), self)
-        self.help_pane = HelpPane(
-            'Help',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
+            self._newwin(1, self.width, self.height - 1, 0), self)
+
+        ##  create queue pane; it is shown on first frame;
         self.queue_pane = QueuePane(
             'Queue',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.database_pane = DatabasePane(
-            'Database',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.lyrics_pane = LyricsPane(
-            'Lyrics',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.artist_album_pane = ArtistAlbumPane(
-            'Artist-Album',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.search_pane = SearchPane(
-            'Search',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.info_pane = InfoPane(
-            'Info',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-        self.output_pane = OutputPane(
-            'Output',
-            curses.newwin(self.height - 4, self.width, 2, 0), self)
-
-        ##  pane list;
-        self.panes = [
-            self.menu_pane,
-            self.line_pane,
-            self.progress_pane,
-            self.status_pane,
-            self.message_pane,
-            self.help_pane,
-            self.queue_pane,
-            self.database_pane,
-            self.lyrics_pane,
-            self.artist_album_pane,
-            self.search_pane,
-            self.info_pane,
-            self.output_pane,
+            self._newwin(self.height - 4, self.width, 2, 0), self)
+
+        ##  block pane factories;
+        ##
+        ##  other block panes are created on first access (see `__getattr__`),
+        ##  so that startup time doesnt depend on database size; for example,
+        ##  database pane runs `lsinfo` and artist-album pane runs `list` when
+        ##  they are created;
+        self._pane_factories = {
+            'help_pane'         : (HelpPane, 'Help'),
+            'database_pane'     : (DatabasePane, 'Database'),
+            'lyrics_pane'       : (LyricsPane, 'Lyrics'),
+            'artist_album_pane' : (ArtistAlbumPane, 'Artist-Album'),
+            'search_pane'       : (SearchPane, 'Search'),
+            'info_pane'         : (InfoPane, 'Info'),
+            'output_pane'       : (OutputPane, 'Output'),
+            'fleet_pane'        : (FleetPane, 'Fleet'),
+            'playlist_pane'     : (PlaylistPane, 'Playlist'),
+        }
+
+        ##  panes which cache data of current server; they are dropped when
+        ##  current server is switched, and created again on access;
+        self._server_panes = [
+            'database_pane',
+            'artist_album_pane',
+            'search_pane',
+            'info_pane',
+            'output_pane',
+            'playlist_pane',
+        ]
+
+        ##  pane order; created panes are processed in this order;
+        self._pane_order = [
+            'menu_pane',
+            'line_pane',
+            'progress_pane',
+            'status_pane',
+            'message_pane',
+            'help_pane',
+            'queue_pane',
+            'database_pane',
+            'lyrics_pane',
+            'artist_album_pane',
+            'search_pane',
+            'info_pane',
+            'output_pane',
+            'fleet_pane',
+            'playlist_pane',
         ]
 
+        ##  pane list; only contains created panes;
+        self._build_pane_list()
+
         ##  current pane;
         self.cpane = self.queue_pane
 
         ##  prev pane;
         self.ppane = None
 
+    def _build_pane_list(self):
+
+        '''
+        build pane list from created panes;
+        '''
+
+        self.panes = [
+            self.__dict__[name] for name in self._pane_order
+            if name in self.__dict__
+        ]
+
+    def __getattr__(self, name):
+
+        '''
+        create a block pane, or lyrics index, on first access;
+
+        this is only called when normal attribute lookup fails; the created
+        pane is stored as an instance attribute, so later lookups dont come
+        here; a pane must be created when not in idle state, because it may
+        send commands to mpd server on creation;
+
+        lyrics index is only needed by lyrics search and lyrics saving; its
+        module is imported here, so that it doesnt slow down startup;
+        '''
+
+        if name == 'lyrics_index':
+            from ncmpy.lyrics import LyricsIndex
+            self.lyrics_index = LyricsIndex(conf.lyrics_dir)
+            return self.lyrics_index
+
+        factories = self.__dict__.get('_pane_factories', {})
+        if name not in factories:
+            raise AttributeError(name)
+
+        cls, title = factories[name]
+        pane = cls(title, self._newwin(self.height - 4, self.width, 2, 0), self)
+        setattr(self, name, pane)
+        self._build_pane_list()
+
+        ##  catch up with data fetched in this event;
+        pane.fetch()
+        return pane
+
     def _init_threads(self):
         self.lyrics_thread = LyricsThread(self)
 
+    def _init_signals(self):
+
+        ##  signal handlers only set flags; a wakeup pipe makes main loop poll
+        ##  return when a signal arrives;
+        self.wakeup_fd, fd = os.pipe()
+        os.set_blocking(self.wakeup_fd, False)
+        os.set_blocking(fd, False)
+        signal.set_wakeup_fd(fd)
+        signal.signal(signal.SIGWINCH, self.handler)
+
     def __init__(self, stdscr):
 
         ##  loop flag;
@@ -185,6 +286,29 @@ class Ncmpy():
         ##  pending mpd commands for batch processing;
         self.batch = []
 
+        ##  background jobs; a job is a generator which does a bounded amount of
+        ##  work per step and yields a progress message; jobs are stepped on
+        ##  sync events, and the main loop doesnt wait while a job is pending;
+        self.jobs = []
+
+        ##  idle events missed while disconnected; they are handled on next
+        ##  sync as if they were returned by `noidle`;
+        self.missed = []
+
+        ##  input char and its count;
+        self.ch = None
+        self.count = 1
+
+        ##  pending digits; they are a count prefix if a count key follows;
+        self.digits = []
+
+        ##  time of last terminal resize; `None` if no pending resize;
+        ##
+        ##  dragging a terminal edge sends many resize signals; windows are
+        ##  resized once, after no more resize signal arrives for a short delay;
+        self.resize_at = None
+        self.resize_delay = 0.1
+
         ##  shared data storage for inter-pane communication;
         self.ipc = {}
 
@@ -195,7 +319,7 @@ class Ncmpy():
         self.itc_cond = Condition()
 
         ##  init components;
-        self._init_mpd(conf.mpd_host, conf.mpd_port)
+        self._init_mpd()
         self._init_curses(stdscr)
         self._init_panes()
         self._init_threads()
@@ -203,8 +327,8 @@ class Ncmpy():
         ##  start lyrics thread;
         self.lyrics_thread.start()
 
-        ##  setup signal handler;
-        signal.signal(signal.SIGWINCH, self.handler)
+        ##  setup signal handlers;
+        self._init_signals()
 
         ##  initial update;
         self.on_event('timeout')
@@ -219,6 +343,21 @@ class Ncmpy():
         self.stats = self.mpc.stats()
         self.currentsong = self.mpc.currentsong()
 
+        idle = self.ipc.get('idle', [])
+        if 'database' in idle:
+            self.cserver.library = None
+
+        ##  load rating index in one request;
+        if 'sticker' in idle:
+            self.ratings.on_sticker()
+        if conf.rate_song and self.ratings.stale:
+            try:
+                stickers = self.mpc.sticker_find('song', '', 'rating')
+            except mpd.CommandError:
+                ##  sticker database is disabled;
+                stickers = []
+            self.ratings.reset(stickers)
+
         for pane in self.panes:
             pane.fetch()
 
@@ -314,6 +453,10 @@ class Ncmpy():
                 self.ipc['msg'] = str(e).rsplit('} ')[1]
             else:
                 self.ipc['msg'] = 'Playlist {} loaded'.format(name)
+        elif self.ch == ks.importpl:
+            path = self.message_pane.getstr('Import')
+            if path:
+                self.jobs.append(self.import_playlist(path))
 
         ##  search items;
         elif self.ch in [ ks.searchdn, ks.searchup ]:
@@ -335,7 +478,22 @@ class Ncmpy():
         round 1;
         '''
 
-        ##  pane switch;
+        ##  server switch;
+        if 'server' in self.ipc:
+            self.switch_server(self.ipc['server'])
+
+        self.switch_pane()
+
+        ##  panes do round1;
+        for pane in self.panes:
+            pane.round1()
+
+    def switch_pane(self):
+
+        '''
+        switch current pane by input char or ipc;
+        '''
+
         if self.ch == ks.panehelp:
             self.ppane, self.cpane = self.cpane, self.help_pane
         elif self.ch == ks.panequeue:
@@ -355,15 +513,15 @@ class Ncmpy():
                 self.ppane, self.cpane = self.cpane, self.ppane
         elif self.ch == ks.paneoutput:
             self.ppane, self.cpane = self.cpane, self.output_pane
+        elif self.ch == ks.panefleet:
+            self.ppane, self.cpane = self.cpane, self.fleet_pane
+        elif self.ch == ks.paneplaylist:
+            self.ppane, self.cpane = self.cpane, self.playlist_pane
         elif 'database-locate' in self.ipc:
             self.cpane = self.database_pane
         elif 'queue-locate' in self.ipc:
             self.cpane = self.queue_pane
 
-        ##  panes do round1;
-        for pane in self.panes:
-            pane.round1()
-
     def update(self):
 
         '''
@@ -380,16 +538,182 @@ class Ncmpy():
     def resize(self):
 
         '''
-        resize windows; called in `SIGWINCH` handler;
+        resize windows;
         '''
 
         curses.endwin()
         self.stdscr.refresh()
         self.height, self.width = self.stdscr.getmaxyx()
 
+        ##  panes not yet created get current size on creation;
         for pane in self.panes:
             pane.resize()
 
+    def switch_server(self, server):
+
+        '''
+        switch current server;
+
+        old server is watched in idle state and keeps its queue; new server's
+        cached queue is swapped into queue pane, so only queue changes since
+        it was last current are fetched; panes which cache data of old server
+        are dropped;
+        '''
+
+        old = self.cserver
+        if server is old:
+            return
+
+        ##  keep state of old server; a server which is down isnt watched;
+        if old.connected:
+            self.enter_idle()
+        old.idle = self.idle
+        old.status, old.stats = self.status, self.stats
+        old.currentsong = self.currentsong
+        old.queue, old.pl_ver = self.queue_pane.queue, self.queue_pane.pl_ver
+
+        ##  drop panes of old server;
+        for name in self._server_panes:
+            self.__dict__.pop(name, None)
+        self._build_pane_list()
+        if self.cpane not in self.panes:
+            self.cpane = self.queue_pane
+        if self.ppane not in self.panes:
+            self.ppane = None
+
+        ##  use new server;
+        self._use_server(server)
+        self.queue_pane.use_queue(server.queue, server.pl_ver)
+        if server.connected:
+            self.leave_idle()
+            self.fetch()
+
+    def on_server_event(self, server):
+
+        '''
+        handle idle event of a server which is not current;
+        '''
+
+        if server.idle:
+            try:
+                server.on_idle()
+            except (mpd.ConnectionError, OSError):
+                server.disconnect()
+            if self.cpane is self.__dict__.get('fleet_pane'):
+                self.update()
+
+    def watch_servers(self):
+
+        '''
+        reconnect servers which are not current, and watch them again;
+        '''
+
+        for server in self.servers:
+            if server is not self.cserver and not server.connected:
+                try:
+                    if server.try_connect():
+                        server.enter_idle()
+                except (mpd.ConnectionError, OSError):
+                    server.disconnect()
+
+    def reconnect(self):
+
+        '''
+        reconnect current server if a retry is due; return `True` if connected;
+
+        cached state is resynced cheaply: queue is reloaded only if server was
+        restarted, as song ids and playlist version restart with it; otherwise
+        only changes since cached playlist version are fetched; database views
+        are reloaded only if database was updated meanwhile;
+        '''
+
+        server = self.cserver
+        if not server.try_connect():
+            return False
+        self.idle = False
+
+        uptime = int(server.stats.get('uptime', 0))
+        if uptime < int(self.stats.get('uptime', 0)) or \
+                int(server.status['playlist']) < self.queue_pane.pl_ver:
+            self.queue_pane.use_queue(self.queue_pane.queue, -1)
+        self.missed = [ 'stored_playlist', 'sticker' ]
+        if server.stats.get('db_update') != self.stats.get('db_update'):
+            self.missed.append('database')
+
+        self.ipc['msg'] = 'Reconnected to {}'.format(server.name)
+        return True
+
+    def on_disconnect(self):
+
+        '''
+        enter disconnected state when connection to current server is lost;
+
+        cached state is kept and shown; pending queue edits are dropped, so
+        queue is reloaded on reconnect;
+        '''
+
+        self.cserver.disconnect()
+        self.idle = False
+        self.seek = False
+        if self.batch:
+            self.batch.clear()
+            self.queue_pane.use_queue(self.queue_pane.queue, -1)
+        self.ipc['msg'] = 'Disconnected from {}; reconnecting...'.format(
+            self.cserver.name)
+        self.update()
+
+    def rate(self, uris, rating):
+
+        '''
+        rate songs in one command list; rating `0` means unrate;
+
+        rating index is updated locally, so that new ratings are shown before
+        the sticker event caused by this loads it again;
+        '''
+
+        if not conf.rate_song:
+            return
+        uris = [ uri for uri in uris if rating or self.ratings.get(uri) ]
+        if not uris:
+            return
+        self.mpc.command_list_ok_begin()
+        for uri in uris:
+            if rating:
+                self.mpc.sticker_set('song', uri, 'rating', rating)
+            else:
+                self.mpc.sticker_delete('song', uri, 'rating')
+        try:
+            self.mpc.command_list_end()
+        except mpd.CommandError as e:
+            self.ipc['msg'] = str(e)
+        else:
+            for uri in uris:
+                self.ratings.set(uri, rating)
+
+    def play_uri(self, uri):
+
+        '''
+        play a song by uri, adding it to queue if it is not queued;
+
+        queue pane's index is used to find the song in queue; if not found, the
+        song is added and played in one command list; either way, this takes a
+        single round trip;
+        '''
+
+        songid = self.queue_pane.find_id(uri)
+        try:
+            if songid is not None:
+                self.mpc.playid(songid)
+            else:
+                ##  the new song is appended to queue;
+                pos = int(self.status['playlistlength'])
+                self.mpc.command_list_ok_begin()
+                self.mpc.addid(uri, pos)
+                self.mpc.play(pos)
+                self.mpc.command_list_end()
+        except mpd.CommandError as e:
+            self.ipc['msg'] = str(e)
+
     def enter_idle(self):
 
         '''
@@ -409,12 +733,141 @@ class Ncmpy():
         if self.idle:
             self.ipc['idle'] = self.mpc.noidle()
             self.idle = False
+        if self.missed:
+            self.ipc['idle'] = self.ipc.get('idle', []) + self.missed
+            self.missed = []
+
+    def step_jobs(self):
+
+        '''
+        run one step of each job; a finished job is removed;
+        '''
+
+        for job in list(self.jobs):
+            ##  a job which raises is removed too;
+            self.jobs.remove(job)
+            try:
+                self.ipc['msg'] = next(job)
+            except StopIteration:
+                continue
+            self.jobs.append(job)
+
+    def import_playlist(self, path):
+
+        '''
+        import a playlist file into queue; this is a job;
+
+        songs are added with `addid`, one command list of `chunk_size` songs per
+        step, so that ui is responsive while a long playlist is imported; uris
+        not in library index are skipped without being sent; uris of streams
+        are not checked; the job is cancelled if current server is switched;
+        '''
+
+        server = self.cserver
+        name = os.path.basename(path)
+        try:
+            fp = open(os.path.expanduser(path), 'rt', encoding='utf-8-sig',
+                errors='replace')
+        except OSError as e:
+            yield 'Cannot import {}: {}'.format(name, e.strerror)
+            return
+
+        added = skipped = 0
+        with fp:
+            library = server.library_index()
+            uris = read_playlist(fp)
+            while True:
+                if server is not self.cserver:
+                    yield 'Import of {} cancelled'.format(name)
+                    return
+                chunk = list(islice(uris, server.chunk_size()))
+                if not chunk:
+                    break
+                valid = chunk if library is None else [
+                    uri for uri in chunk if '://' in uri or uri in library
+                ]
+                results, errors = send_commands(
+                    self.mpc, [ ('addid', [ uri ]) for uri in valid ])
+                added += len(valid) - len(errors)
+                skipped += len(chunk) - len(valid) + len(errors)
+                yield 'Importing {}: {} added, {} skipped'.format(
+                    name, added, skipped)
+        yield 'Imported {}: {} added, {} skipped'.format(name, added, skipped)
+
+    def flush_digits(self):
+
+        '''
+        return pending digits as key presses of their own;
+        '''
+
+        keys = [ (ch, 1) for ch in self.digits ]
+        self.digits = []
+        return keys
+
+    def read_keys(self):
+
+        '''
+        read all pending keys; return a list of key presses `(ch, count)`;
+
+        digits before a count key are its count prefix (`20j`); digits before
+        other keys are key presses of their own, as digits are also bound to
+        rating and volume; trailing digits are kept pending until next key or
+        timeout, so a digit typed alone is handled after timeout; a run of the
+        same count key is merged into one key press, so that a held key costs
+        one movement;
+        '''
+
+        chs = []
+        self.stdscr.nodelay(True)
+        ch = self.stdscr.getch()
+        while ch != -1:
+            chs.append(ch)
+            ch = self.stdscr.getch()
+        self.stdscr.nodelay(False)
+
+        keys = []
+        for i, ch in enumerate(chs):
+            ##  curses reports resize as a key;
+            if ch == curses.KEY_RESIZE:
+                self.resize_at = time.monotonic()
+                continue
+
+            ##  a count prefix doesnt start with `0`;
+            if ord('0') <= ch <= ord('9') and (self.digits or ch != ord('0')):
+                self.digits.append(ch)
+                continue
+
+            count = 1
+            if self.digits and ch in ksg.count:
+                count = int(bytes(self.digits).decode())
+                self.digits = []
+            keys += self.flush_digits()
+
+            if keys and ch in ksg.count and keys[-1][0] == ch:
+                keys[-1] = (ch, keys[-1][1] + count)
+            else:
+                keys.append((ch, count))
+
+            ##  leave remaining keys to prompt;
+            if ch in ksg.prompt:
+                for ch in reversed(chs[i + 1:]):
+                    curses.ungetch(ch)
+                break
+
+        return keys
 
     def on_event(self, type_):
 
         '''
         main loop event handler;
 
+        all pending keys are handled in one event; windows are updated once
+        after the last key;
+
+        when connection to current server is lost, ncmpy is in disconnected
+        state until reconnected; only keys which dont need the server are
+        handled in this state;
+
         ## params
 
         type_:str
@@ -422,36 +875,99 @@ class Ncmpy():
         '''
 
         if type_ == 'stdin':
-            self.ch = self.stdscr.getch()
-            if self.ch == ks.quit:
-                self.loop = False
+            keys = self.read_keys()
+            if not keys:
                 return
-            sync = (self.ch not in ksg.local)
+        elif type_ == 'timeout':
+            ##  pending digits are not followed by a count key;
+            keys = self.flush_digits() + [ (None, 1) ]
         else:
-            self.ch = None
-            sync = True
+            keys = [ (None, 1) ]
 
         self.ipc.clear()
 
-        if sync:
-            self.leave_idle()
-            if self.batch:
-                self.mpc.command_list_ok_begin()
-                for cmd in self.batch:
-                    exec('self.mpc.' + cmd)
-                self.mpc.command_list_end()
-                self.batch.clear()
-            self.fetch()
+        try:
+            if not self.cserver.connected and not self.reconnect():
+                keys = self.handle_offline(keys)
+                if not keys:
+                    return
+            self.handle_keys(keys)
+            if type_ != 'stdin':
+                self.enter_idle()
+        except connection_errors:
+            self.on_disconnect()
+
+    def handle_offline(self, keys):
+
+        '''
+        handle key presses in disconnected state;
+
+        quit, offline keys and server switch in fleet pane are handled; other
+        keys are ignored; when switched to a connected server, keys not yet
+        handled are returned with a sync, so that they are handled as usual;
+
+        ## params
+
+        keys:list
+        :   key presses: `[(ch, count)]`;
+
+        ## return
+
+        :list
+        :   key presses left to handle;
+        '''
+
+        for i, (ch, count) in enumerate(keys):
+            self.ch, self.count = ch, count
+            if ch == ks.quit:
+                self.loop = False
+                return []
+            if ch in ksg.offline or (ch == ks.play and
+                    self.cpane is self.__dict__.get('fleet_pane')):
+                self.cpane.round0()
+                self.switch_pane()
+            if 'server' in self.ipc:
+                self.switch_server(self.ipc.pop('server'))
+                if self.cserver.connected:
+                    return [ (None, 1) ] + keys[i + 1:]
 
-        self.round0()
-        self.round1()
         self.update()
+        return []
 
-        if type_ == 'stdin':
-            ##  flush input buffer to discard any typeaheads;
-            curses.flushinp()
-        else:
-            self.enter_idle()
+    def handle_keys(self, keys):
+
+        '''
+        handle key presses; a key press `(None, 1)` is a sync without key;
+        '''
+
+        for ch, count in keys:
+            self.ch, self.count = ch, count
+            if self.ch == ks.quit:
+                self.loop = False
+                return
+
+            ##  keep message of previous key until update;
+            msg = self.ipc.get('msg')
+            self.ipc.clear()
+            if msg:
+                self.ipc['msg'] = msg
+
+            if self.ch is None or self.ch not in ksg.local:
+                self.leave_idle()
+                if self.batch:
+                    self.mpc.command_list_ok_begin()
+                    for cmd in self.batch:
+                        exec('self.mpc.' + cmd)
+                    self.mpc.command_list_end()
+                    self.batch.clear()
+                if self.ch is None:
+                    self.step_jobs()
+                self.fetch()
+
+            self.round0()
+            self.round1()
+
+        self.update()
 
     def main_loop(self):
 
@@ -459,34 +975,69 @@ class Ncmpy():
         main loop;
         '''
 
-        poll = select.poll()
-        poll.register(self.mpc.fileno(), select.POLLIN)
-        poll.register(sys.stdin.fileno(), select.POLLIN)
-
         self.loop = True
         while self.loop:
+            ##  connected servers: `{fd: server}`;
+            self.watch_servers()
+            fds = {
+                server.fileno(): server for server in self.servers
+                if server.connected
+            }
+            poll = select.poll()
+            for fd in fds:
+                poll.register(fd, select.POLLIN)
+            poll.register(sys.stdin.fileno(), select.POLLIN)
+            poll.register(self.wakeup_fd, select.POLLIN)
+
             try:
-                resps = poll.poll(200)
-                if not resps:
+                ##  dont wait while a job is pending; wake up when a pending
+                ##  resize is due;
+                timeout = 0 if self.jobs else 200
+                if self.resize_at is not None:
+                    timeout = max(0, min(timeout, 1000 * (
+                        self.resize_at + self.resize_delay - time.monotonic())))
+                resps = poll.poll(timeout)
+                if not resps and self.resize_at is None:
                     self.on_event('timeout')
-                    continue
                 for fd, event in resps:
-                    if fd == self.mpc.fileno() and event & select.POLLIN:
-                        self.on_event('mpd')
+                    if fd == self.wakeup_fd:
+                        ##  drain wakeup pipe; signal handlers have run;
+                        os.read(self.wakeup_fd, 512)
+                    if fd in fds and event & select.POLLIN:
+                        if fds[fd] is self.cserver:
+                            self.on_event('mpd')
+                        else:
+                            self.on_server_event(fds[fd])
                     if fd == sys.stdin.fileno() and event & select.POLLIN:
                         self.on_event('stdin')
+                self.on_resize()
             except OSError:
                 ##  ignore poll interruption;
                 pass
 
+    def on_resize(self):
+
+        '''
+        resize and repaint windows once if terminal size has settled;
+        '''
+
+        if self.resize_at is None:
+            return
+        if time.monotonic() - self.resize_at < self.resize_delay:
+            return
+        self.resize_at = None
+        self.resize()
+        self.update()
+
     def handler(self, signum, frame):
 
-        '''signal handler;'''
+        '''
+        signal handler; only set flags, so that it is safe to run at any point
+        of main loop;
+        '''
 
         if signum == signal.SIGWINCH:
-            self.resize()
-            ##  consume `KEY_RESIZE`;
-            self.stdscr.getch()
+            self.resize_at = time.monotonic()
 
 def _main(stdscr):
 
@@ -502,8 +1053,21 @@ def main():
     main function;
     '''
 
+    parser = ArgumentParser(prog='ncmpy', description='a curses mpd client;')
+    parser.add_argument(
+        '--batch', metavar='FILE',
+        help='run mpd commands from FILE (`-` for stdin) without curses',
+    )
+    args = parser.parse_args()
+
+    load_conf()
+
+    if args.batch is not None:
+        from ncmpy.batch import main as batch_main
+        return batch_main(args.batch)
+
     return wrapper(_main)
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+'''
+batch module;
+
+run mpd commands from a file or stdin, without curses, over one connection;
+
+each line is a command in mpd protocol syntax, such as `add "a b.mp3"` or
+`delete 0:5`; empty lines and lines starting with `#` are skipped; commands
+are streamed and sent in command lists of bounded size; when a command
+fails, its error is reported and the rest of its command list is sent again;
+'''
+
+from itertools import islice
+import mpd
+import re
+import shlex
+import sys
+
+from ncmpy.config import conf
+from ncmpy.fleet import servers_from_conf
+from ncmpy.util import send_commands
+
+def parse_line(line):
+
+    '''
+    parse a command line into `(name, args)`; return `None` if empty;
+
+    unquoted ranges `start:end` and `start:` are converted to tuples, as
+    required by `python-mpd2`; quoted ones, such as `"07:30"`, are strings;
+    sticker commands such as `sticker set` are named as in `python-mpd2`
+    (`sticker_set`);
+    '''
+
+    ##  words, and whether each is unquoted: its text in line is the word;
+    lexer = shlex.shlex(line, posix=True)
+    lexer.whitespace_split = True
+    words, bare = [], []
+    pos = 0
+    for word in lexer:
+        end = lexer.instream.tell()
+        words.append(word)
+        bare.append(line[pos:end].strip() == word)
+        pos = end
+    if not words:
+        return None
+    if words[0] == 'sticker' and len(words) > 1:
+        words[:2] = [ 'sticker_' + words[1] ]
+        bare[:2] = [ True ]
+    args = []
+    for word, unquoted in zip(words[1:], bare[1:]):
+        m = unquoted and re.fullmatch(r'(\d+):(\d*)', word)
+        if m:
+            word = tuple(int(i) for i in m.groups() if i)
+        args.append(word)
+    return words[0], args
+
+def format_result(result):
+
+    '''
+    format a command result as lines in mpd protocol syntax;
+    '''
+
+    if result is None:
+        return []
+    if isinstance(result, dict):
+        lines = []
+        for k, v in result.items():
+            for i in (v if isinstance(v, list) else [ v ]):
+                lines.append('{}: {}'.format(k, i))
+        return lines
+    if isinstance(result, list):
+        return [ line for item in result for line in format_result(item) ]
+    return [ str(result) ]
+
+##  commands which change connection state; they are not run in batch mode;
+unbatched = [ 'idle', 'noidle', 'close' ]
+
+def is_command(name, commands):
+
+    '''
+    return `True` if a command name is an mpd command that can be batched;
+    sticker commands such as `sticker_set` are checked as `sticker`;
+
+    ## params
+
+    name:str
+    :   command name, as returned by `parse_line`;
+
+    commands:set
+    :   commands allowed by server, as returned by `commands`;
+    '''
+
+    if name.startswith('sticker_'):
+        name = 'sticker'
+    return name in commands and name not in unbatched
+
+def read_commands(lines, err):
+
+    '''
+    parse command lines; return an iterator of `(lineno, name, args)`;
+    malformed lines are reported and skipped;
+    '''
+
+    for lineno, line in enumerate(lines, 1):
+        try:
+            cmd = parse_line(line)
+        except ValueError as e:
+            err.write('{}: {}\n'.format(lineno, e))
+            continue
+        if cmd is not None:
+            yield (lineno,) + cmd
+
+def run(mpc, lines, size, out=sys.stdout, err=sys.stderr):
+
+    '''
+    run command lines; return number of failed commands;
+
+    ## params
+
+    mpc:mpd.MPDClient
+    :   connected mpd client;
+
+    lines:iterable
+    :   command lines;
+
+    size:int
+    :   max number of commands per command list;
+
+    out:file
+    :   where command results are written;
+
+    err:file
+    :   where errors are written, as `{lineno}: {error}`;
+    '''
+
+    ##  client methods which are not mpd commands, such as `disconnect`, are
+    ##  not run;
+    commands = set(mpc.commands())
+
+    failed = 0
+    cmds = read_commands(lines, err)
+    while True:
+        chunk = list(islice(cmds, size))
+        if not chunk:
+            break
+
+        ##  unknown commands are not sent;
+        for lineno, name, args in chunk:
+            if not is_command(name, commands) or not hasattr(mpc, name):
+                err.write('{}: unknown command: {}\n'.format(lineno, name))
+                failed += 1
+        chunk = [
+            cmd for cmd in chunk
+            if is_command(cmd[1], commands) and hasattr(mpc, cmd[1])
+        ]
+
+        ##  results and errors are written in command order;
+        results, errors = send_commands(mpc, [ cmd[1:] for cmd in chunk ])
+        errors = dict(errors)
+        failed += len(errors)
+        for i, result in enumerate(results):
+            if i in errors:
+                err.write('{}: {}\n'.format(chunk[i][0], errors[i]))
+            for line in format_result(result):
+                out.write(line + '\n')
+
+    return failed
+
+def main(path):
+
+    '''
+    run commands from a file, or stdin if `path` is `-`; return exit status;
+    '''
+
+    server = servers_from_conf(conf)[0]
+    try:
+        fp = sys.stdin if path == '-' else open(path, 'rt')
+    except OSError as e:
+        sys.stderr.write('ncmpy: cannot open {}: {}\n'.format(
+            path, e.strerror))
+        return 2
+    try:
+        server.connect()
+        failed = run(server.mpc, fp, server.chunk_size())
+    except (mpd.ConnectionError, OSError) as e:
+        sys.stderr.write('ncmpy: connection to {} failed: {}\n'.format(
+            server.name, e))
+        return 2
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+        try:
+            server.mpc.disconnect()
+        except (mpd.ConnectionError, OSError):
+            pass
+    return 1 if failed else 0
@@ -6,7 +6,6 @@ config module;
 
 from os.path import expanduser
 from types import SimpleNamespace as namespace
-import yaml
 
 from ncmpy.keysym import keysym as ks
 from ncmpy.keysym import name2code as n2c
@@ -17,38 +16,68 @@ conf = namespace()
 ##  default config values;
 conf.mpd_host = 'localhost'
 conf.mpd_port = 6600
+conf.mpd_socket = '/run/mpd/socket'
+conf.mpd_timeout = 10
+conf.mpd_connect_timeout = 0.5
 conf.rate_song = True
 conf.lyrics_dir = expanduser('~/.ncmpy/lyrics')
+conf.queue_eta = False
+conf.servers = []
+conf.autoqueue_ahead = 10
 
-##  read config files;
-for fname in [
+##  config file names; the first readable one is used;
+conf_files = [
     expanduser('~/.config/ncmpy/ncmpy.yaml'),
     '/etc/ncmpy/ncmpy.yaml',
-]:
-    try:
-        with open(fname, 'rt') as fp:
-            data = yaml.load(fp)
-    except:
-        continue
-
-    ##  update config values;
-    if data.get('mpd_host') is not None:
-        conf.mpd_host = data.get('mpd_host')
-    if data.get('mpd_port') is not None:
-        conf.mpd_port = data.get('mpd_port')
-    if data.get('rate_song') is not None:
-        conf.rate_song = data.get('rate_song')
-    if data.get('lyrics_dir') is not None:
-        conf.lyrics_dir = expanduser(data.get('lyrics_dir'))
-
-    ##  update keysyms;
-    if data.get('keysym') is not None:
-        for sym, name in data.get('keysym').items():
-            if hasattr(ks, sym):
-                setattr(ks, sym, n2c(name))
-            else:
-                raise Exception('invalid keysym: {}'.format(sym))
-
-    ##  break after config read;
-    break
+]
 
+def load_conf():
+
+    '''
+    read config files and update config values and keysyms;
+
+    this is called by the main function instead of at import time, so that
+    importing this module (and `yaml`) doesnt slow down startup;
+    '''
+
+    import yaml
+
+    for fname in conf_files:
+        try:
+            with open(fname, 'rt') as fp:
+                data = yaml.safe_load(fp)
+        except:
+            continue
+
+        ##  update config values;
+        if data.get('mpd_host') is not None:
+            conf.mpd_host = data.get('mpd_host')
+        if data.get('mpd_port') is not None:
+            conf.mpd_port = data.get('mpd_port')
+        if data.get('mpd_socket') is not None:
+            conf.mpd_socket = data.get('mpd_socket')
+        if data.get('mpd_timeout') is not None:
+            conf.mpd_timeout = data.get('mpd_timeout')
+        if data.get('mpd_connect_timeout') is not None:
+            conf.mpd_connect_timeout = data.get('mpd_connect_timeout')
+        if data.get('rate_song') is not None:
+            conf.rate_song = data.get('rate_song')
+        if data.get('lyrics_dir') is not None:
+            conf.lyrics_dir = expanduser(data.get('lyrics_dir'))
+        if data.get('queue_eta') is not None:
+            conf.queue_eta = data.get('queue_eta')
+        if data.get('servers') is not None:
+            conf.servers = data.get('servers')
+        if data.get('autoqueue_ahead') is not None:
+            conf.autoqueue_ahead = data.get('autoqueue_ahead')
+
+        ##  update keysyms;
+        if data.get('keysym') is not None:
+            for sym, name in data.get('keysym').items():
+                if hasattr(ks, sym):
+                    setattr(ks, sym, n2c(name))
+                else:
+                    raise Exception('invalid keysym: {}'.format(sym))
+
+        ##  break after config read;
+        break
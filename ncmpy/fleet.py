@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+'''
+fleet module;
+
+a fleet is a list of mpd servers; each server has its own connection, which
+is kept in idle state while the server is not current, so that its state is
+kept up to date by idle events, in the same event loop;
+
+a lost connection is retried with exponential backoff; cached state is kept
+while disconnected, so that it can be resynced cheaply on reconnect;
+
+a local server is connected through its unix socket if it exists; a remote
+server is connected through tcp with nagle disabled and keepalive enabled;
+round trip time is measured on connect;
+'''
+
+from os.path import exists
+import mpd
+import socket
+import time
+
+from ncmpy.model import QueueModel
+from ncmpy.model import RatingIndex
+from ncmpy.util import send_commands
+
+##  errors of a lost connection, as raised by mpd client; other os errors,
+##  such as those of local files, are not connection errors;
+connection_errors = (mpd.ConnectionError, ConnectionError, socket.timeout)
+
+def _client_socket(mpc):
+
+    '''
+    return socket of an mpd client; `None` if not connected;
+
+    python-mpd2 has no public accessor for it; it is kept in private attribute
+    `_sock` (python-mpd2 1.1 to 3.1); this is the only place which reads it;
+    '''
+
+    return getattr(mpc, '_sock', None)
+
+class Server():
+
+    '''
+    an mpd server: connection, idle flag and cached state;
+    '''
+
+    ##  hosts which are connected through unix socket if it exists;
+    local_hosts = [ 'localhost', '127.0.0.1', '::1' ]
+
+    def __init__(self, name, host, port, socket_path=None, timeout=None,
+            connect_timeout=None):
+
+        '''
+        init this server;
+
+        ## params
+
+        name:str
+        :   display name;
+
+        host:str
+        :   mpd host;
+
+        port:int
+        :   mpd port;
+
+        socket_path:str
+        :   unix socket path of a local server;
+
+        timeout:float
+        :   read timeout in seconds;
+
+        connect_timeout:float
+        :   connect timeout in seconds, including fetching state on connect;
+            it is short, since connecting blocks ui;
+        '''
+
+        self.name = name
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+
+        ##  round trip time in seconds; measured on connect;
+        self.rtt = 0
+
+        ##  mpd client;
+        self.mpc = mpd.MPDClient()
+
+        ##  idle flag; see `Ncmpy.idle`;
+        self.idle = False
+
+        ##  connection flag;
+        self.connected = False
+
+        ##  time of next connection attempt, and delay of the one after it;
+        self.retry_at = 0
+        self.backoff = 1
+
+        ##  cached state;
+        self.status = {}
+        self.stats = {}
+        self.currentsong = {}
+
+        ##  cached queue and its playlist version; they are swapped into queue
+        ##  pane when this server becomes current;
+        self.queue = QueueModel()
+        self.pl_ver = -1
+
+        ##  rating index;
+        self.ratings = RatingIndex()
+
+        ##  library index: set of song uris in database; loaded on first use
+        ##  and dropped on database change;
+        self.library = None
+
+    def connect(self):
+
+        '''
+        connect to mpd server and fetch its state;
+
+        connect timeout applies until state is fetched, so that a server which
+        accepts a connection but doesnt answer doesnt block ui for long; read
+        timeout applies afterwards;
+        '''
+
+        self.mpc.timeout = self.connect_timeout
+        self.mpc.connect(*self.address())
+        self._tune()
+        self.connected = True
+        self.idle = False
+        self.rtt = self.probe()
+        self.stats = self.mpc.stats()
+        self.refresh()
+        self.mpc.timeout = self.timeout
+
+    def address(self):
+
+        '''
+        return `(host, port)` to connect to; host is a unix socket path if this
+        server is local and its socket exists;
+        '''
+
+        if self.host.startswith('/'):
+            return self.host, None
+        if self.host in self.local_hosts and self.socket_path and \
+                exists(self.socket_path):
+            return self.socket_path, None
+        return self.host, self.port
+
+    def _tune(self):
+
+        '''
+        set options of a tcp connection: disable nagle, so that small commands
+        are sent at once; enable keepalive, so that a dead link is detected;
+        '''
+
+        sock = _client_socket(self.mpc)
+        if sock is not None and sock.family in (
+                socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    def probe(self, n=3):
+
+        '''
+        measure round trip time as the minimum of `n` pings;
+        '''
+
+        rtt = None
+        for i in range(n):
+            t = time.perf_counter()
+            self.mpc.ping()
+            t = time.perf_counter() - t
+            rtt = t if rtt is None else min(rtt, t)
+        return rtt
+
+    def chunk_size(self):
+
+        '''
+        return number of commands per command list;
+
+        a slow link gets larger command lists, so that round trip time is paid
+        less often; a fast link gets smaller ones, so that a long list doesnt
+        block the ui;
+        '''
+
+        return max(64, min(4096, int(self.rtt * 64000)))
+
+    def disconnect(self):
+
+        '''
+        close a lost connection and schedule reconnect;
+        '''
+
+        try:
+            self.mpc.disconnect()
+        except (mpd.ConnectionError, OSError):
+            pass
+        self.connected = False
+        self.idle = False
+        self.retry_at = time.monotonic() + self.backoff
+        self.backoff = min(30, 2 * self.backoff)
+
+    def try_connect(self):
+
+        '''
+        connect to mpd server if a retry is due; return `True` if connected;
+        '''
+
+        if self.connected:
+            return True
+        if time.monotonic() < self.retry_at:
+            return False
+        try:
+            self.connect()
+        except (mpd.ConnectionError, OSError):
+            self.disconnect()
+            return False
+        self.backoff = 1
+        return True
+
+    def fileno(self):
+        return self.mpc.fileno()
+
+    def refresh(self):
+
+        '''
+        fetch status and current song in one command list;
+        '''
+
+        self.mpc.command_list_ok_begin()
+        self.mpc.status()
+        self.mpc.currentsong()
+        self.status, self.currentsong = self.mpc.command_list_end()
+
+    def library_index(self):
+
+        '''
+        return library index; `None` if server refuses to list database;
+
+        listing a large database at once exceeds server output buffer, so a
+        directory which is refused is listed by its subdirectories instead;
+        directories of a level are listed in command lists; `None` is returned
+        only if a directory cant be listed even by its entries;
+        '''
+
+        if self.library is None:
+            library = set()
+            dirs = [ '' ]
+            try:
+                while dirs:
+                    results, errors = send_commands(
+                        self.mpc, [ ('listall', [ d ]) for d in dirs ])
+                    for items in results:
+                        library.update(
+                            item['file'] for item in items or []
+                            if 'file' in item)
+                    refused = [ dirs[i] for i, e in errors ]
+                    dirs = []
+                    for d in refused:
+                        for item in self.mpc.lsinfo(d):
+                            if 'file' in item:
+                                library.add(item['file'])
+                            elif 'directory' in item:
+                                dirs.append(item['directory'])
+            except mpd.CommandError:
+                return None
+            self.library = library
+        return self.library
+
+    def enter_idle(self):
+
+        '''
+        enter idle state;
+        '''
+
+        if not self.idle:
+            self.mpc.send_idle()
+            self.idle = True
+
+    def leave_idle(self):
+
+        '''
+        leave idle state; return changed subsystems;
+        '''
+
+        events = []
+        if self.idle:
+            events = self.mpc.noidle()
+            self.idle = False
+        return events
+
+    def on_idle(self):
+
+        '''
+        handle idle event of a server which is not current: refresh cached
+        state and watch again;
+        '''
+
+        events = self.leave_idle()
+        self.refresh()
+        if 'database' in events:
+            self.stats = self.mpc.stats()
+            self.library = None
+        if 'sticker' in events:
+            self.ratings.on_sticker()
+        self.enter_idle()
+        return events
+
+def servers_from_conf(conf):
+
+    '''
+    create servers from config; a single server is created from `mpd_host` and
+    `mpd_port` if no server is listed;
+    '''
+
+    if not conf.servers:
+        return [
+            Server(
+                conf.mpd_host, conf.mpd_host, conf.mpd_port,
+                conf.mpd_socket, conf.mpd_timeout, conf.mpd_connect_timeout,
+            )
+        ]
+    return [
+        Server(
+            s.get('name', s.get('host', conf.mpd_host)),
+            s.get('host', conf.mpd_host),
+            s.get('port', conf.mpd_port),
+            s.get('socket_path', conf.mpd_socket),
+            s.get('timeout', conf.mpd_timeout),
+            s.get('connect_timeout', conf.mpd_connect_timeout),
+        )
+        for s in conf.servers
+    ]
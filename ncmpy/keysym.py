@@ -26,6 +26,8 @@ keyname.f5              =   curses.KEY_F5
 keyname.f6              =   curses.KEY_F6
 keyname.f7              =   curses.KEY_F7
 keyname.f8              =   curses.KEY_F8
+keyname.f9              =   curses.KEY_F9
+keyname.f10             =   curses.KEY_F10
 
 ##  keysym to keycode mapping;
 ##
@@ -44,6 +46,7 @@ keysym.repeat           =   ord('o')
 keysym.single           =   ord('p')
 keysym.savepl           =   ord('S')
 keysym.loadpl           =   ord('O')
+keysym.importpl         =   ord('I')
 keysym.searchdn         =   ord('/')
 keysym.searchup         =   ord('?')
 keysym.searchnext       =   ord('n')
@@ -80,6 +83,11 @@ keysym.update           =   ord('U')
 keysym.savelyrics       =   ord('K')
 keysym.search           =   ord('B')
 keysym.toggle           =   ord('t')
+keysym.visual           =   ord('v')
+keysym.addall           =   ord('A')
+keysym.toprated         =   ord('T')
+keysym.autoqueue        =   ord('R')
+keysym.searchlyrics     =   ord('F')
 keysym.seekb            =   curses.KEY_LEFT
 keysym.seekf            =   curses.KEY_RIGHT
 keysym.seekbp           =   curses.KEY_DOWN
@@ -92,6 +100,8 @@ keysym.paneartistalbum  =   curses.KEY_F5
 keysym.panesearch       =   curses.KEY_F6
 keysym.paneinfo         =   curses.KEY_F7
 keysym.paneoutput       =   curses.KEY_F8
+keysym.panefleet        =   curses.KEY_F9
+keysym.paneplaylist     =   curses.KEY_F10
 
 ##  keysym groups;
 keysymgrp = namespace()
@@ -111,15 +121,42 @@ keysymgrp.local = [
     keysym.linedn, keysym.lineup, keysym.pagedn, keysym.pageup,
     keysym.top, keysym.mid, keysym.bot,
     keysym.first, keysym.last,
+    keysym.visual,
     ##  these keysyms are pseudo-local; they actually send command to server,
     ##  but not immediately after we press them;
     keysym.seekb, keysym.seekf, keysym.seekbp, keysym.seekfp,
     keysym.swapdn, keysym.swapup,
 ]
+##  offline keysyms; these keysyms dont need mpd server, so they are handled
+##  in disconnected state too: moving in current pane, and switching to panes
+##  which show cached state;
+keysymgrp.offline = [
+    keysym.linedn, keysym.lineup, keysym.pagedn, keysym.pageup,
+    keysym.top, keysym.mid, keysym.bot,
+    keysym.first, keysym.last,
+    keysym.panehelp, keysym.panequeue, keysym.panefleet,
+]
 ##  search keysyms;
 keysymgrp.search = [
     keysym.searchdn, keysym.searchup, keysym.searchnext, keysym.searchprev,
 ]
+##  count keysyms; these keysyms take a count prefix (`20j`, `5J`), and a run
+##  of them is merged into one key press with summed count;
+##
+##  since a digit may start a count prefix, a keysym bound to a digit (rating,
+##  volume) takes effect when a key which is not a count keysym follows it, or
+##  after input timeout (200ms) when it is typed alone; `0` never starts a
+##  count prefix, so `volup` takes effect at once;
+keysymgrp.count = [
+    keysym.linedn, keysym.lineup, keysym.pagedn, keysym.pageup,
+    keysym.swapdn, keysym.swapup,
+]
+##  prompt keysyms; these keysyms read a string from user, so keys typed after
+##  them are left to the prompt;
+keysymgrp.prompt = [
+    keysym.savepl, keysym.loadpl, keysym.importpl,
+    keysym.searchdn, keysym.searchup, keysym.search, keysym.searchlyrics,
+]
 
 def name2code(name):
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+'''
+layout module;
+
+compute display width of strings in terminal cells; east asian wide and
+fullwidth characters take 2 cells; combining marks and format characters take
+0 cells; other characters take 1 cell;
+
+results are cached, because the same strings (titles, tags) are laid out again
+and again on every frame;
+'''
+
+from functools import lru_cache
+from unicodedata import category
+from unicodedata import east_asian_width
+
+def char_width(ch):
+
+    '''
+    return display width of a character;
+    '''
+
+    if category(ch) in ('Mn', 'Me', 'Cf'):
+        return 0
+    if east_asian_width(ch) in ('W', 'F'):
+        return 2
+    return 1
+
+@lru_cache(maxsize=4096)
+def width(s):
+
+    '''
+    return display width of a string;
+    '''
+
+    ##  fast path for ascii strings;
+    if len(s) == len(s.encode('utf-8')):
+        return len(s)
+    return sum(map(char_width, s))
+
+@lru_cache(maxsize=4096)
+def truncate(s, cols):
+
+    '''
+    return longest prefix of a string which fits in given display width;
+    '''
+
+    if width(s) <= cols:
+        return s
+    w = 0
+    for i, ch in enumerate(s):
+        w += char_width(ch)
+        if w > cols:
+            return s[:i]
+    return s
+
+def fit(s, cols):
+
+    '''
+    truncate a string and pad it with spaces to exactly given display width;
+    '''
+
+    s = truncate(s, cols)
+    return s + ' ' * (cols - width(s))
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+'''
+lyrics module;
+
+full-text search over saved lyrics; an inverted index `{word: {file, ...}}`
+over lyrics text, with lrc tags and timestamps stripped, is kept in a json file
+in lyrics dir; on update, only files which are added, changed (by mtime) or
+removed since last update are indexed again;
+
+cjk characters are indexed one by one, because cjk text has no spaces between
+words;
+'''
+
+from os.path import join
+import json
+import os
+import re
+
+from ncmpy.util import lrc_parse
+
+##  cjk ranges: kana, cjk ideographs (with extension a and compatibility
+##  ideographs) and hangul syllables;
+_cjk = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+
+##  a word is a run of word characters, or a single cjk character;
+_word = re.compile(r'[{0}]|[^\W{0}]+'.format(_cjk))
+
+def words(text):
+
+    '''
+    split text into lowercase words;
+    '''
+
+    return _word.findall(text.lower())
+
+def lyrics_lines(lrc):
+
+    '''
+    return text lines of lyrics, in time order, without tags, timestamps,
+    empty lines and repeated lines; plain text lyrics are split into lines;
+    '''
+
+    tags, tms = lrc_parse(lrc)
+    lines = [ tms[tm] for tm in sorted(tms) ] if tms else lrc.splitlines()
+    seen = set()
+    texts = []
+    for line in lines:
+        line = line.strip()
+        if line and line not in seen:
+            seen.add(line)
+            texts.append(line)
+    return tags, texts
+
+class LyricsIndex():
+
+    '''
+    inverted index over saved lyrics;
+
+    only postings and file info are kept in index file; lines are read from
+    lyrics files of candidates when searching, so that index file stays small,
+    as it is written again on every change;
+    '''
+
+    ##  index file name, in lyrics dir;
+    index_name = '.index.json'
+
+    ##  index file format; an index file of another format is rebuilt;
+    version = 2
+
+    def __init__(self, lyrics_dir):
+        self.lyrics_dir = lyrics_dir
+
+        ##  indexed files: `{fname: {mtime, artist, title}}`; `None` if index
+        ##  is not loaded; `song` is `[artist, title]` of the song whose lyrics
+        ##  were saved, as file name may not keep them;
+        self.files = None
+
+        ##  inverted index: `{word: {fname, ...}}`;
+        self.postings = {}
+
+        ##  index is changed since last save;
+        self._dirty = False
+
+    def _path(self, fname):
+        return join(self.lyrics_dir, fname)
+
+    def load(self):
+
+        '''
+        load index file; an unreadable index file is rebuilt;
+        '''
+
+        try:
+            with open(self._path(self.index_name), 'rt') as fp:
+                data = json.load(fp)
+            if data['version'] != self.version:
+                raise ValueError(data['version'])
+            self.files = data['files']
+            self.postings = {
+                word: set(fnames) for word, fnames in data['words'].items()
+            }
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+            self.postings = {}
+
+    def save(self):
+
+        '''
+        save index file if changed; it is replaced atomically;
+        '''
+
+        if not self._dirty:
+            return
+        data = {
+            'version': self.version,
+            'files': self.files,
+            'words': {
+                word: sorted(fnames) for word, fnames in self.postings.items()
+            },
+        }
+        path = self._path(self.index_name)
+        with open(path + '.tmp', 'wt') as fp:
+            json.dump(data, fp, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+        self._dirty = False
+
+    def _read(self, fname):
+
+        '''
+        return `(tags, lines)` of a lyrics file; `None` if it cant be read;
+        '''
+
+        try:
+            with open(self._path(fname), 'rt', errors='replace') as fp:
+                return lyrics_lines(fp.read())
+        except OSError:
+            return None
+
+    def _index(self, fname, mtime, song=None):
+
+        '''
+        index a lyrics file;
+        '''
+
+        lyrics = self._read(fname)
+        if lyrics is None:
+            return
+        tags, lines = lyrics
+
+        ##  `{artist} - {title}.lrc`, unless lrc tags say otherwise;
+        artist, _, title = fname[:-len('.lrc')].partition(' - ')
+        entry = {
+            'mtime': mtime,
+            'artist': tags.get('ar') or artist,
+            'title': tags.get('ti') or title,
+        }
+        if song is not None:
+            entry['song'] = song
+        self.files[fname] = entry
+        for word in set(words(' '.join(
+                lines + [ entry['artist'], entry['title'] ]))):
+            self.postings.setdefault(word, set()).add(fname)
+        self._dirty = True
+
+    def _unindex(self, fnames):
+
+        '''
+        remove lyrics files from index; their words are not known any more, so
+        all postings are checked, once for all files;
+        '''
+
+        if not fnames:
+            return
+        for fname in fnames:
+            del self.files[fname]
+        for word in list(self.postings):
+            self.postings[word] -= fnames
+            if not self.postings[word]:
+                del self.postings[word]
+        self._dirty = True
+
+    def update(self):
+
+        '''
+        index files which are added, changed or removed since last update, and
+        save index;
+        '''
+
+        if self.files is None:
+            self.load()
+        try:
+            mtimes = {
+                entry.name: entry.stat().st_mtime
+                for entry in os.scandir(self.lyrics_dir)
+                if entry.name.endswith('.lrc') and entry.is_file()
+            }
+        except FileNotFoundError:
+            mtimes = {}
+
+        changed = {
+            fname for fname, entry in self.files.items()
+            if mtimes.get(fname) != entry['mtime']
+        }
+        songs = { fname: self.files[fname].get('song') for fname in changed }
+        self._unindex(changed)
+        for fname, mtime in mtimes.items():
+            if fname not in self.files:
+                self._index(fname, mtime, songs.get(fname))
+        self.save()
+
+    def add(self, fname, artist=None, title=None):
+
+        '''
+        index a saved lyrics file at once; this is skipped if index is not
+        loaded, since the file is found on next update anyway;
+
+        ## params
+
+        fname:str
+        :   lyrics file name;
+
+        artist:str
+        :   artist of the song, as file name may not keep it;
+
+        title:str
+        :   title of the song, as file name may not keep it;
+        '''
+
+        if self.files is None:
+            return
+        if fname in self.files:
+            self._unindex({ fname })
+        song = None if artist is None and title is None else \
+            [ artist or '', title or '' ]
+        self._index(fname, os.stat(self._path(fname)).st_mtime, song)
+        self.save()
+
+    def search(self, query):
+
+        '''
+        find lyrics lines which contain query words in sequence;
+
+        candidate files are those which contain all query words, found by
+        intersecting their postings, smallest first; their lines are then
+        read and checked;
+
+        ## return
+
+        `[(artist, title, line), ...]`, one per file, in file name order;
+        artist and title are those of the song if known;
+        '''
+
+        if self.files is None:
+            self.load()
+        qwords = words(query)
+        if not qwords:
+            return []
+        postings = sorted(
+            (self.postings.get(word, set()) for word in set(qwords)), key=len)
+        fnames = set(postings[0])
+        for p in postings[1:]:
+            fnames &= p
+
+        phrase = ' {} '.format(' '.join(qwords))
+        results = []
+        for fname in sorted(fnames):
+            entry = self.files[fname]
+            artist, title = entry.get('song') or \
+                (entry['artist'], entry['title'])
+            lyrics = self._read(fname)
+            for line in lyrics[1] if lyrics else []:
+                if phrase in ' {} '.format(' '.join(words(line))):
+                    results.append((artist, title, line))
+                    break
+        return results
@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+
+'''
+model module;
+'''
+
+import sys
+
+class Song():
+
+    '''
+    song record, as returned by `playlistinfo`, `find` and the like;
+
+    common fields are kept in slots instead of a per-song dict; other fields
+    are kept in an extra dict, which is only created when needed; values of
+    tags shared by many songs (artist, album, genre, date, ...) are interned,
+    so that songs with the same tag value hold one copy of it;
+
+    songs are read as dicts are: `song['file']`, `song.get('artist')`, `'id'
+    in song`; client-side fields can be set with `song[key] = value`;
+    '''
+
+    ##  fields kept in slots;
+    fields = [
+        'file', 'id', 'pos', 'title', 'artist', 'albumartist', 'album',
+        'track', 'disc', 'genre', 'date', 'time', 'duration',
+    ]
+
+    ##  fields whose values are interned;
+    shared = {
+        'artist', 'albumartist', 'album', 'track', 'disc', 'genre', 'date',
+        'time', 'duration', 'composer', 'performer', 'format',
+    }
+
+    _slots = frozenset(fields)
+
+    __slots__ = fields + [ '_extra' ]
+
+    def __init__(self, item={}):
+        self._extra = None
+        for key, value in item.items():
+            self._set(key, value)
+
+    ##  lookups are bound as defaults, since this runs for every field of
+    ##  every song;
+    def _set(self, key, value,
+            slots=_slots, shared=shared, intern=sys.intern):
+        if key in shared:
+            if isinstance(value, str):
+                value = intern(value)
+            elif isinstance(value, list):
+                value = [ intern(v) for v in value ]
+        if key in slots:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    __setitem__ = _set
+
+    def __getitem__(self, key):
+        if key in self._slots:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __contains__(self, key):
+        if key in self._slots:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Song, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return 'Song({!r})'.format(dict(self.items()))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [ key for key in self.fields if hasattr(self, key) ]
+        if self._extra is not None:
+            keys.extend(self._extra)
+        return keys
+
+    def items(self):
+        return [ (key, self[key]) for key in self.keys() ]
+
+def to_songs(items):
+
+    '''
+    convert song dicts to song records;
+    '''
+
+    return [ Song(item) for item in items ]
+
+def memory_usage(songs):
+
+    '''
+    return memory used by songs in bytes; objects shared by songs, such as
+    interned tag values, are counted once;
+    '''
+
+    seen = set()
+    total = 0
+
+    def count(obj):
+        nonlocal total
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+            return True
+        return False
+
+    for song in songs:
+        count(song)
+        if isinstance(song, Song):
+            if song._extra is not None:
+                count(song._extra)
+        for key, value in song.items():
+            count(key)
+            if count(value) and isinstance(value, list):
+                for v in value:
+                    count(v)
+    return total
+
+class Fenwick():
+
+    '''
+    fenwick tree (binary indexed tree) over a list of non-negative numbers;
+
+    point update, prefix sum, append and search take O(log n) time;
+    '''
+
+    def __init__(self, values=()):
+        self._tree = [ 0 ] + list(values)
+        for i in range(1, len(self._tree)):
+            j = i + (i & -i)
+            if j < len(self._tree):
+                self._tree[j] += self._tree[i]
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def add(self, i, delta):
+
+        '''
+        add `delta` to value at index `i`;
+        '''
+
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+
+        '''
+        return sum of first `i` values;
+        '''
+
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def append(self, value):
+
+        '''
+        append a value;
+        '''
+
+        i = len(self._tree)
+        self._tree.append(
+            value + self.prefix(i - 1) - self.prefix(i - (i & -i)))
+
+    def search(self, k):
+
+        '''
+        return index `i` such that `prefix(i) <= k < prefix(i + 1)`;
+        '''
+
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+class RatingIndex():
+
+    '''
+    song ratings: `{uri: rating}`;
+
+    ratings are song stickers named `rating`; the index is loaded with one
+    `sticker find` and loaded again when stickers change, so that rating of any
+    song is known without a request; unrated songs are not in the index;
+    '''
+
+    def __init__(self):
+        self._ratings = {}
+
+        ##  index is out of date; it is loaded again on next sync;
+        self.stale = True
+
+        ##  version; it is increased on every change;
+        self.version = 0
+
+    def __len__(self):
+        return len(self._ratings)
+
+    def get(self, uri):
+
+        '''
+        return rating of a song; `0` if unrated;
+        '''
+
+        return self._ratings.get(uri, 0)
+
+    def set(self, uri, rating):
+
+        '''
+        set rating of a song; rating `0` means unrate;
+        '''
+
+        if rating:
+            self._ratings[uri] = rating
+        else:
+            self._ratings.pop(uri, None)
+        self.version += 1
+
+    def reset(self, stickers):
+
+        '''
+        replace all ratings, as returned by `sticker_find('song', '',
+        'rating')`;
+        '''
+
+        self._ratings = {}
+        for item in stickers:
+            name, _, value = item.get('sticker', '').partition('=')
+            if name == 'rating' and value.isdigit() and int(value):
+                self._ratings[item['file']] = int(value)
+        self.stale = False
+        self.version += 1
+
+    def on_sticker(self):
+
+        '''
+        handle a sticker idle event; index is out of date, as the event doesnt
+        tell which stickers are changed, or by which client;
+        '''
+
+        self.stale = True
+
+    def top(self):
+
+        '''
+        return uris of rated songs, highest rating first;
+        '''
+
+        return sorted(
+            self._ratings, key=lambda uri: (-self._ratings[uri], uri))
+
+class Sampler():
+
+    '''
+    weighted random sampler over indexes `[0, n)`, by the alias method;
+
+    building takes O(n) time; drawing takes O(1) time: pick a column uniformly,
+    then pick either its own index or its alias by the column's probability;
+    '''
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        self._prob = [ 1.0 ] * n
+        self._alias = list(range(n))
+        if not total:
+            return
+
+        ##  scaled weights; average is 1; each column is filled up to 1 by
+        ##  moving weight from a column above 1;
+        scaled = [ w * n / total for w in weights ]
+        small = [ i for i, p in enumerate(scaled) if p < 1 ]
+        large = [ i for i, p in enumerate(scaled) if p >= 1 ]
+        while small and large:
+            s = small.pop()
+            l = large[-1]
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1 - scaled[s]
+            if scaled[l] < 1:
+                small.append(large.pop())
+
+        ##  remaining columns are full, up to rounding errors;
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def __len__(self):
+        return len(self._prob)
+
+    def draw(self, rng):
+
+        '''
+        draw an index with `rng`, a `random.Random`;
+        '''
+
+        i = int(rng.random() * len(self._prob))
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+def duration(song):
+
+    '''
+    return song duration in whole seconds; `0` if unknown;
+    '''
+
+    tm = song.get('time', '')
+    return int(tm) if tm.isdigit() else 0
+
+class QueueModel():
+
+    '''
+    queue (current playlist) with indexes;
+
+    songs are kept in a list ordered by position; these indexes are kept up to
+    date through local edits and syncs with mpd server:
+
+    -   `{songid: pos}`;
+    -   `{file: {songid, ...}}`;
+
+    so that finding a song by id or file doesnt scan the queue;
+
+    song durations are kept in a fenwick tree over slots, so that start time
+    of a song and total time of queue are computed in O(log n) time; each song
+    has a slot; slots are ordered as songs; deleting a song only empties its
+    slot; an alive-slot fenwick tree maps positions to slots; slots are
+    compacted when most of them are empty;
+    '''
+
+    def __init__(self):
+        self.reset([])
+
+    def __len__(self):
+        return len(self.songs)
+
+    def __getitem__(self, pos):
+        return self.songs[pos]
+
+    def __iter__(self):
+        return iter(self.songs)
+
+    def __contains__(self, uri):
+        return uri in self._ids
+
+    def _link(self, song, pos):
+        self._pos[song['id']] = pos
+        self._ids.setdefault(song['file'], set()).add(song['id'])
+
+    def _unlink(self, song):
+        del self._pos[song['id']]
+        ids = self._ids[song['file']]
+        ids.discard(song['id'])
+        if not ids:
+            del self._ids[song['file']]
+
+    def _reindex(self, beg, end):
+        for pos in range(beg, end):
+            self._pos[self.songs[pos]['id']] = pos
+
+    def _build_slots(self):
+        self._durs = [ duration(song) for song in self.songs ]
+        self._alive = Fenwick([ 1 ] * len(self.songs))
+        self._dur = Fenwick(self._durs)
+
+    def _slot(self, pos):
+        return self._alive.search(pos)
+
+    def _set_dur(self, pos):
+
+        '''
+        update slot duration of song at given position;
+        '''
+
+        slot = self._slot(pos)
+        dur = duration(self.songs[pos])
+        self._dur.add(slot, dur - self._durs[slot])
+        self._durs[slot] = dur
+
+    def _kill_slot(self, pos):
+
+        '''
+        empty slot of song at given position, before the song is removed;
+        '''
+
+        slot = self._slot(pos)
+        self._alive.add(slot, -1)
+        self._dur.add(slot, -self._durs[slot])
+        self._durs[slot] = 0
+
+    def _add_slot(self, song):
+
+        '''
+        add slot for a song appended to queue;
+        '''
+
+        self._durs.append(duration(song))
+        self._alive.append(1)
+        self._dur.append(self._durs[-1])
+
+    def _compact(self):
+        if len(self._durs) > 2 * len(self.songs) + 1024:
+            self._build_slots()
+
+    def reset(self, songs):
+
+        '''
+        replace all songs, as returned by `playlistinfo`;
+        '''
+
+        self.songs = songs
+        self._pos = {}
+        self._ids = {}
+        for pos, song in enumerate(self.songs):
+            self._link(song, pos)
+        self._build_slots()
+
+    def start_of(self, pos):
+
+        '''
+        return total duration of songs before given position;
+        '''
+
+        return self._dur.prefix(self._slot(pos)) if pos < len(self.songs) \
+            else self.total()
+
+    def total(self):
+
+        '''
+        return total duration of queue;
+        '''
+
+        return self._dur.prefix(len(self._durs))
+
+    def sync(self, changes, length):
+
+        '''
+        apply changes since last sync, as returned by `plchanges`;
+
+        ## params
+
+        changes:list
+        :   songs which are new or whose position changed, in position order;
+
+        length:int
+        :   new queue length;
+        '''
+
+        for pos in range(len(self.songs) - 1, length - 1, -1):
+            self._unlink(self.songs[pos])
+            self._kill_slot(pos)
+        del self.songs[length:]
+
+        for song in changes:
+            pos = int(song['pos'])
+
+            ##  put this song into its slot; a song may be removed from its
+            ##  old slot before it is put into its new slot;
+            if pos < len(self.songs):
+                old = self.songs[pos]
+                if self._pos.get(old['id']) == pos:
+                    self._unlink(old)
+                self.songs[pos] = song
+                self._set_dur(pos)
+            else:
+                self.songs.append(song)
+                self._add_slot(song)
+            if song['id'] in self._pos:
+                self._unlink(self.songs[self._pos[song['id']]])
+            self._link(song, pos)
+
+        self._compact()
+
+    def delete(self, beg, end=None):
+
+        '''
+        delete songs in range `[beg, end)`, or at `beg` if `end` is `None`;
+        '''
+
+        if end is None:
+            end = beg + 1
+        for pos in range(beg, end):
+            ##  slot of next song moves to `beg` after a slot is emptied;
+            self._kill_slot(beg)
+        songs = self.songs[beg:end]
+        del self.songs[beg:end]
+        for song in songs:
+            self._unlink(song)
+        self._reindex(beg, len(self.songs))
+        self._compact()
+        return songs
+
+    def move(self, beg, end, to):
+
+        '''
+        move songs in range `[beg, end)` to position `to`, as mpd `move` does;
+        `to` is the position of the first moved song after the move;
+        '''
+
+        songs = self.songs[beg:end]
+        del self.songs[beg:end]
+        self.songs[to:to] = songs
+        for pos in range(min(beg, to), max(end, to + len(songs))):
+            self._pos[self.songs[pos]['id']] = pos
+            self._set_dur(pos)
+
+    def swap(self, i, j):
+
+        '''
+        swap songs at given positions;
+        '''
+
+        self.songs[i], self.songs[j] = self.songs[j], self.songs[i]
+        self._reindex(i, i + 1)
+        self._reindex(j, j + 1)
+        self._set_dur(i)
+        self._set_dur(j)
+
+    def pos_of_id(self, songid):
+
+        '''
+        find position of a song by id; return `None` if not queued;
+        '''
+
+        return self._pos.get(songid)
+
+    def positions(self, uri):
+
+        '''
+        find positions of a file in queue, in ascending order;
+        '''
+
+        return sorted(self._pos[i] for i in self._ids.get(uri, ()))
+
+    def find_pos(self, uri):
+
+        '''
+        find position of first entry of a file; return `None` if not queued;
+        '''
+
+        ids = self._ids.get(uri)
+        if not ids:
+            return None
+        return min(self._pos[i] for i in ids)
+
+    def find_id(self, uri):
+
+        '''
+        find song id of first entry of a file; return `None` if not queued;
+        '''
+
+        pos = self.find_pos(uri)
+        return None if pos is None else self.songs[pos]['id']
@@ -4,6 +4,7 @@
 pane module;
 '''
 
+from functools import partial
 from os.path import basename
 from os.path import dirname
 from os.path import isdir
@@ -18,10 +19,19 @@ from ncmpy.config import conf
 from ncmpy.keysym import code2name as c2n
 from ncmpy.keysym import keysym as ks
 from ncmpy.keysym import keysymgrp as ksg
+from ncmpy.layout import fit
+from ncmpy.layout import truncate
+from ncmpy.model import QueueModel
+from ncmpy.model import Sampler
+from ncmpy.model import Song
+from ncmpy.model import to_songs
+from ncmpy.util import LruCache
+from ncmpy.util import add_uris
 from ncmpy.util import format_time
 from ncmpy.util import get_tag
 from ncmpy.util import lrc_basename
 from ncmpy.util import lrc_parse
+from ncmpy.util import send_commands
 
 class Pane():
 
@@ -51,12 +61,38 @@ class Pane():
         self.win = win
         self.ctrl = ctrl
 
-        self.mpc = self.ctrl.mpc
         self.ipc = self.ctrl.ipc
         self.itc = self.ctrl.itc
         self.itc_cond = self.ctrl.itc_cond
         self.height, self.width = self.win.getmaxyx()
 
+        ##  input char and its count prefix;
+        self.ch = None
+        self.count = 1
+
+        ##  key handlers: `{keycode: handler}`;
+        ##
+        ##  a handler is called with no argument when its key is pressed in
+        ##  this pane; handlers which take a count read it from `self.count`;
+        self.handlers = {}
+
+    @property
+    def mpc(self):
+
+        '''
+        mpd client of current server;
+        '''
+
+        return self.ctrl.mpc
+
+    def build_title(self):
+
+        '''
+        build title shown in menu pane;
+        '''
+
+        return self.name
+
     def fetch(self):
 
         '''
@@ -76,9 +112,15 @@ class Pane():
         if self == self.ctrl.cpane:
             ##  current pane takes input char;
             self.ch = self.ctrl.ch
+            self.count = self.ctrl.count
         else:
             ##  other panes take no input;
             self.ch = None
+            self.count = 1
+
+        handler = self.handlers.get(self.ch)
+        if handler is not None:
+            handler()
 
     def round1(self):
 
@@ -173,17 +215,24 @@ class ScrollPane(BlockPane):
         ##  beginning line number;
         self.beg = 0
 
-    def line_down(self):
-        self.beg = max(0, min(self.num - self.height, self.beg + 1))
+        self.handlers.update({
+            ks.linedn   : lambda: self.line_down(self.count),
+            ks.lineup   : lambda: self.line_up(self.count),
+            ks.pagedn   : lambda: self.page_down(self.count),
+            ks.pageup   : lambda: self.page_up(self.count),
+        })
+
+    def line_down(self, n=1):
+        self.beg = max(0, min(self.num - self.height, self.beg + n))
 
-    def line_up(self):
-        self.beg = max(0, min(self.num - self.height, self.beg - 1))
+    def line_up(self, n=1):
+        self.beg = max(0, min(self.num - self.height, self.beg - n))
 
-    def page_down(self):
-        self.beg = max(0, min(self.num - self.height, self.beg + self.height))
+    def page_down(self, n=1):
+        self.line_down(n * self.height)
 
-    def page_up(self):
-        self.beg = max(0, min(self.num - self.height, self.beg - self.height))
+    def page_up(self, n=1):
+        self.line_up(n * self.height)
 
     def locate(self, pos):
         self.beg = max(0, min(self.num - self.height, pos - self.height // 2))
@@ -210,33 +259,102 @@ class CursedPane(BlockPane):
         ##  current line number;
         self.cur = 0
 
-    def line_down(self):
+        ##  marked line number in visual mode; `None` if not in visual mode;
+        ##
+        ##  in visual mode, lines between marked and selected line are selected;
+        self.mark = None
+
+        ##  rendered rows: `{(key, width): row}`;
+        self._rows = LruCache(1024)
+
+        self.handlers.update({
+            ks.linedn   : lambda: self.line_down(self.count),
+            ks.lineup   : lambda: self.line_up(self.count),
+            ks.pagedn   : lambda: self.page_down(self.count),
+            ks.pageup   : lambda: self.page_up(self.count),
+            ks.top      : self.select_top,
+            ks.mid      : self.select_mid,
+            ks.bot      : self.select_bot,
+            ks.first    : self.select_first,
+            ks.last     : self.select_last,
+        })
+
+    def render_row(self, key, build):
+
+        '''
+        return rendered row of an item, from cache if possible;
+
+        a rendered row holds ready-to-draw strings; display attributes are not
+        part of it, so it doesnt change with selection;
+
+        ## params
+
+        key:
+        :   item key, unique in this pane;
+
+        build:callable
+        :   build rendered row; called on cache miss;
+        '''
+
+        key = (key, self.width)
+        row = self._rows.get(key)
+        if row is None:
+            row = build()
+            self._rows.put(key, row)
+        return row
+
+    def forget_row(self, key):
+
+        '''
+        remove rendered row of an item from cache;
+        '''
+
+        self._rows.pop((key, self.width))
+
+    def toggle_visual(self):
+        self.mark = self.sel if self.mark is None else None
+
+    def selected(self):
+
+        '''
+        return selected range `(beg, end)`, excluding `end`;
+
+        in visual mode, this is the range between marked and selected line;
+        otherwise, this is the selected line;
+        '''
+
+        if self.mark is None:
+            return self.sel, self.sel + 1
+        mark = self.clamp(self.mark)
+        return min(mark, self.sel), max(mark, self.sel) + 1
+
+    def line_down(self, n=1):
         if self.sel < self.num - 1:
-            self.sel += 1
-            if self.sel - self.beg == self.height:
-                self.beg += 1
+            self.sel = min(self.num - 1, self.sel + n)
+            if self.sel - self.beg >= self.height:
+                self.beg = self.sel - self.height + 1
 
-    def line_up(self):
+    def line_up(self, n=1):
         if self.sel > 0:
-            self.sel -= 1
-            if self.sel - self.beg == -1:
-                self.beg -= 1
-
-    def page_down(self):
-        if self.sel < self.num - self.height:
-            self.sel += self.height
-            self.beg = min(self.num - self.height, self.beg + self.height)
+            self.sel = max(0, self.sel - n)
+            if self.sel < self.beg:
+                self.beg = self.sel
+
+    def page_down(self, n=1):
+        if self.sel < self.num - n * self.height:
+            self.sel += n * self.height
+            self.beg = min(self.num - self.height, self.beg + n * self.height)
         else:
             self.sel = self.num - 1
             self.beg = max(0, self.num - self.height)
 
-    def page_up(self):
-        if self.sel < self.height:
+    def page_up(self, n=1):
+        if self.sel < n * self.height:
             self.sel = 0
             self.beg = 0
         else:
-            self.sel -= self.height
-            self.beg = max(0, self.beg - self.height)
+            self.sel -= n * self.height
+            self.beg = max(0, self.beg - n * self.height)
 
     def select_top(self):
         self.sel = self.beg
@@ -265,6 +383,7 @@ class CursedPane(BlockPane):
     def _resize(self, y, x):
         super()._resize(y, x)
         self.sel = min(self.beg + self.height - 1, self.sel)
+        self._rows.clear()
 
     def search(self, pane_name, ch):
         if not (self.ctrl.search_kw and self.ctrl.search_dr): return
@@ -290,6 +409,9 @@ class CursedPane(BlockPane):
                     title = item
                 elif self._type == 'song':
                     title = get_tag('title', item) or basename(item['file'])
+            elif pane_name == 'Playlist':
+                title = item['playlist'] if self.playlist is None \
+                    else basename(item)
 
             if self.ctrl.search_kw in title:
                 found = True
@@ -314,7 +436,9 @@ class MenuPane(BarPane):
         self.win.attron(curses.A_BOLD)
 
     def build_menu_str(self):
-        title = self.ctrl.cpane.name
+        title = self.ctrl.cpane.build_title()
+        if len(self.ctrl.servers) > 1:
+            title = '[{}] {}'.format(self.ctrl.cserver.name, title)
         mode = '{:5s}{:5s}{:5s}{:5s}'.format(
             '[con]' if int(self.status['consume']) else '',
             '[ran]' if int(self.status['random']) else '',
@@ -402,10 +526,8 @@ class StatusPane(BarPane):
             elapsed_mm, elapsed_ss, total_mm, total_ss)
 
     def update(self):
-        ##  use two strs because it is difficult to calculate display length of
-        ##  unicode characters;
-        title = self.build_title_str()
         tm = self.build_tm_str()
+        title = truncate(self.build_title_str(), self.width - len(tm) - 1)
 
         self.win.erase()
         self.win.insstr(0, 0, title)
@@ -479,6 +601,8 @@ class HelpPane(ScrollPane):
             ['item', c2n(ks.panesearch)     , 'search'                  ],
             ['item', c2n(ks.paneinfo)       , 'info'                    ],
             ['item', c2n(ks.paneoutput)     , 'output'                  ],
+            ['item', c2n(ks.panefleet)      , 'fleet'                   ],
+            ['item', c2n(ks.paneplaylist)   , 'playlist'                ],
             ['void', ''                     , ''                        ],
             ['item', c2n(ks.quit)           , 'quit'                    ],
             ['void', ''                     , ''                        ],
@@ -514,6 +638,8 @@ class HelpPane(ScrollPane):
             ['item', c2n(ks.top)            , 'move to top of screen'   ],
             ['item', c2n(ks.mid)            , 'move to mid of screen'   ],
             ['item', c2n(ks.bot)            , 'move to bot of screen'   ],
+            ['item', c2n(ks.visual)         , 'toggle visual selection' ],
+            ['item', 'N' + c2n(ks.linedn)   , 'repeat a move N times'   ],
             ['void', ''                     , ''                        ],
             ['item', c2n(ks.searchdn)       , 'search down'             ],
             ['item', c2n(ks.searchup)       , 'search up'               ],
@@ -534,14 +660,16 @@ class HelpPane(ScrollPane):
             ['item', c2n(ks.rate4)          , 'rate song as  ****'      ],
             ['item', c2n(ks.rate5)          , 'rate song as *****'      ],
             ['void', ''                     , ''                        ],
-            ['item', c2n(ks.swapdn)         , 'move down selected song' ],
-            ['item', c2n(ks.swapup)         , 'move up selected song'   ],
+            ['item', c2n(ks.swapdn)         , 'move down selected songs'],
+            ['item', c2n(ks.swapup)         , 'move up selected songs'  ],
             ['item', c2n(ks.shuffle)        , 'shuffle queue'           ],
             ['item', c2n(ks.clear)          , 'clear queue'             ],
             ['item', c2n(ks.add)            , 'add songs from database' ],
-            ['item', c2n(ks.delete)         , 'delete song from queue'  ],
+            ['item', c2n(ks.delete)         , 'delete songs from queue' ],
             ['item', c2n(ks.savepl)         , 'save queue to playlist'  ],
             ['item', c2n(ks.loadpl)         , 'load queue from playlist'],
+            ['item', c2n(ks.importpl)       , 'import playlist file'    ],
+            ['item', c2n(ks.autoqueue)      , 'toggle auto-queue'       ],
             ['void', ''                     , ''                        ],
             ['head', 'database'             , ''                        ],
             ['line', ''                     , ''                        ],
@@ -551,6 +679,7 @@ class HelpPane(ScrollPane):
             ['item', c2n(ks.add)            , 'append song to queue'    ],
             ['item', c2n(ks.dblocate)       , 'locate song in queue'    ],
             ['item', c2n(ks.update)         , 'update database'         ],
+            ['item', c2n(ks.rate1) + '-' + c2n(ks.rate5), 'rate songs'  ],
             ['void', ''                     , ''                        ],
             ['head', 'lyrics'               , ''                        ],
             ['line', ''                     , ''                        ],
@@ -565,12 +694,18 @@ class HelpPane(ScrollPane):
             ['item', c2n(ks.root)           , 'go to root level'        ],
             ['item', c2n(ks.add)            , 'append song to queue'    ],
             ['item', c2n(ks.dblocate)       , 'locate song in queue'    ],
+            ['item', c2n(ks.rate1) + '-' + c2n(ks.rate5), 'rate songs'  ],
             ['void', ''                     , ''                        ],
             ['head', 'search'               , ''                        ],
             ['line', ''                     , ''                        ],
-            ['item', c2n(ks.search)         , 'search {name}:{value}'   ],
+            ['item', c2n(ks.search)         , 'search {name}={value}'   ],
             ['item', c2n(ks.play)           , 'play song'               ],
             ['item', c2n(ks.add)            , 'append song to queue'    ],
+            ['item', c2n(ks.addall)         , 'append all to queue'     ],
+            ['item', c2n(ks.toprated)       , 'list top rated songs'    ],
+            ['item', c2n(ks.searchlyrics)   , 'search saved lyrics'     ],
+            ['item', c2n(ks.locate)         , 'locate song in database' ],
+            ['item', c2n(ks.rate1) + '-' + c2n(ks.rate5), 'rate songs'  ],
             ['item', c2n(ks.dblocate)       , 'locate song in queue'    ],
             ['void', ''                     , ''                        ],
             ['head', 'info'                 , ''                        ],
@@ -580,21 +715,20 @@ class HelpPane(ScrollPane):
             ['line', ''                     , ''                        ],
             ['item', c2n(ks.toggle)         , 'toggle output'           ],
             ['void', ''                     , ''                        ],
+            ['head', 'fleet'                , ''                        ],
+            ['line', ''                     , ''                        ],
+            ['item', c2n(ks.play)           , 'switch to server'        ],
+            ['void', ''                     , ''                        ],
+            ['head', 'playlist'             , ''                        ],
+            ['line', ''                     , ''                        ],
+            ['item', c2n(ks.play)           , 'open playlist|play song' ],
+            ['item', c2n(ks.parent)         , 'go to playlist list'     ],
+            ['item', c2n(ks.add)            , 'append songs to queue'   ],
+            ['item', c2n(ks.delete)         , 'delete playlist|songs'   ],
+            ['void', ''                     , ''                        ],
         ]
         self.num = len(self.lines)
 
-    def round0(self):
-        super().round0()
-
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-
     def update(self):
         self.win.erase()
         for i in range(self.beg, min(self.num, self.beg + self.height)):
@@ -615,8 +749,14 @@ class QueuePane(CursedPane):
 
     '''
     display queue (current playlist);
+
+    in auto-queue mode, songs are picked at random from library, weighted by
+    rating, and added so that a number of songs are ahead of current song;
     '''
 
+    ##  sampling weights of ratings `0..5` in auto-queue mode;
+    weights = [ 1, 2, 4, 8, 16, 32 ]
+
     def __init__(self, name, win, ctrl):
         super().__init__(name, win, ctrl)
 
@@ -626,129 +766,248 @@ class QueuePane(CursedPane):
         ##  auto center current song;
         self.auto_center = False
 
+        ##  queue model; `items` is an alias used by common pane code;
+        self.queue = self.items = QueueModel()
+
+        ##  auto-queue mode; `random` is imported on first use, so that it
+        ##  doesnt slow down startup;
+        self.auto_queue = False
+        self._rng = None
+
+        ##  sampler over sorted library uris; it is built again when library
+        ##  index or rating index changes; library index is compared by
+        ##  identity, since a new index may reuse the id of a dropped one;
+        self._sampler = None
+        self._sampled_lib = None
+        self._sampled_ver = None
+        self._uris = []
+
+        self.handlers.update({
+            ks.locate   : lambda: self.locate(self.cur),
+            ks.add      : lambda: self.mpc.add(''),
+            ks.clear    : self._clear,
+            ks.visual   : self.toggle_visual,
+            ks.delete   : self._delete,
+            ks.swapdn   : lambda: self._swap(+ self.count),
+            ks.swapup   : lambda: self._swap(- self.count),
+            ks.shuffle  : lambda: self.mpc.shuffle(),
+            ks.play     : lambda: self.mpc.playid(self.items[self.sel]['id']),
+            ks.lock     : self._toggle_lock,
+            ks.dblocate : self._dblocate,
+            ks.autoqueue: self._toggle_auto_queue,
+        })
+        for rating, key in enumerate([ ks.unrate ] + ksg.rate):
+            self.handlers[key] = partial(self._rate_selected, rating)
+        for key in ksg.search:
+            self.handlers[key] = lambda: self.search(self.name, self.ch)
+
     def fetch(self):
         super().fetch()
 
-        ##  fetch playlist if playlist version is different;
-        if self.pl_ver != int(self.status['playlist']):
-            self.items = self.mpc.playlistinfo()
-            self.num = len(self.items)
+        ##  sync playlist if playlist version is different; only fetch changes
+        ##  after first sync;
+        pl_ver = int(self.status['playlist'])
+        if self.pl_ver != pl_ver:
+            if self.pl_ver < 0:
+                new = to_songs(self.mpc.playlistinfo())
+                self.queue.reset(new)
+            else:
+                changes = to_songs(self.mpc.plchanges(self.pl_ver))
+                for song in changes:
+                    self.forget_row(song['id'])
+                self.queue.sync(changes, int(self.status['playlistlength']))
+            self.num = len(self.queue)
             self.beg = self.clamp(self.beg)
             self.sel = self.clamp(self.sel)
-
-            for song in self.items:
-                if conf.rate_song:
-                    try:
-                        sticker = self.mpc.sticker_get(
-                            'song', song['file'], 'rating')
-                        rating = int(sticker)
-                    except mpd.CommandError:
-                        rating = 0
-                    finally:
-                        song['rating'] = rating
-                else:
-                    song['rating'] = 0
-
-            self.pl_ver = int(self.status['playlist'])
+            self.pl_ver = pl_ver
 
         ##  current song;
         self.cur = int(self.status.get('song', '0'))
 
+        ##  queue may run low after a song is played or removed;
+        idle = self.ipc.get('idle', [])
+        if self.auto_queue and ('playlist' in idle or 'player' in idle):
+            self._top_up()
+
+    def _build_sampler(self):
+
+        '''
+        return sampler over library; `None` if there is no library index;
+        '''
+
+        library = self.ctrl.cserver.library_index()
+        if library is None:
+            return None
+        ratings = self.ctrl.ratings
+        if self._sampled_lib is not library or \
+                self._sampled_ver != ratings.version:
+            if self._sampled_lib is not library:
+                self._uris = sorted(library)
+            self._sampler = Sampler([
+                self.weights[min(5, ratings.get(uri))] for uri in self._uris
+            ])
+            self._sampled_lib = library
+            self._sampled_ver = ratings.version
+        return self._sampler
+
+    def _top_up(self):
+
+        '''
+        add songs so that `conf.autoqueue_ahead` songs are ahead of current
+        song; songs are added in one command list;
+        '''
+
+        cur = int(self.status['song']) if 'song' in self.status else -1
+        need = conf.autoqueue_ahead - (len(self.queue) - cur - 1)
+        if need <= 0:
+            return
+        sampler = self._build_sampler()
+        if not sampler:
+            self.auto_queue = False
+            self.ipc['msg'] = 'Auto-queue needs a listable library'
+            return
+
+        uris = []
+        for i in range(need):
+            ##  avoid queued songs, with a few retries;
+            for j in range(8):
+                uri = self._uris[sampler.draw(self._rng)]
+                if uri not in self.queue and uri not in uris:
+                    break
+            uris.append(uri)
+        results, errors = send_commands(
+            self.mpc, [ ('addid', [ uri ]) for uri in uris ])
+
+        ##  songs may be gone from database; sampler is built again from a
+        ##  fresh library index on next top-up;
+        if errors:
+            self._sampled_lib = None
+            self.ctrl.cserver.library = None
+            self.ipc['msg'] = 'Auto-queue skipped {} missing songs'.format(
+                len(errors))
+
+    def _toggle_auto_queue(self):
+        if self._rng is None:
+            import random
+            self._rng = random.Random()
+        self.auto_queue = not self.auto_queue
+        self.ipc['msg'] = 'Auto-queue {}'.format(
+            'on' if self.auto_queue else 'off')
+        if self.auto_queue:
+            self._top_up()
+
+    def use_queue(self, queue, pl_ver):
+
+        '''
+        replace queue with a cached queue of another server; only changes
+        since `pl_ver` are fetched on next sync;
+        '''
+
+        self.queue = self.items = queue
+        self.pl_ver = pl_ver
+        self.num = len(self.queue)
+        self.beg = self.clamp(self.beg)
+        self.sel = self.clamp(self.sel)
+        self.mark = None
+        self._rows.clear()
+
+    def _move(self, beg, end, to):
+
+        '''
+        move songs in range `[beg, end)` to position `to`; the command is sent
+        in next batch; marked and current line follow the moved songs;
+        '''
+
+        if end - beg == 1:
+            self.ctrl.batch.append('move({}, {})'.format(beg, to))
+        else:
+            self.ctrl.batch.append('move(({}, {}), {})'.format(beg, end, to))
+
+        cur = self.queue[self.cur]['id'] if 0 <= self.cur < self.num else None
+        self.queue.move(beg, end, to)
+        if cur is not None:
+            self.cur = self.queue.pos_of_id(cur)
+        if self.mark is not None:
+            self.mark += to - beg
+
+    def find_id(self, uri):
+
+        '''
+        find song id of a file in queue; return `None` if not queued;
+        '''
+
+        return self.queue.find_id(uri)
+
+    def _clear(self):
+        self.mpc.clear()
+        self.queue.reset([])
+        self.num = self.beg = self.sel = self.cur = 0
+
+    def _delete(self):
+
+        '''
+        delete selected songs; the command is sent in next batch;
+        '''
+
+        if self.num == 0:
+            return
+        beg, end = self.selected()
+        if end - beg == 1:
+            self.ctrl.batch.append('deleteid({})'.format(self.queue[beg]['id']))
+        else:
+            self.ctrl.batch.append('delete(({}, {}))'.format(beg, end))
+        self.queue.delete(beg, end)
+        if self.cur >= end:
+            self.cur -= end - beg
+        elif self.cur > beg:
+            self.cur = beg
+        self.num = len(self.queue)
+        self.mark = None
+        self.sel = beg
+        self.beg = self.clamp(self.beg)
+        self.sel = self.clamp(self.sel)
+        self.cur = self.clamp(self.cur)
+
+    def _swap(self, n):
+
+        '''
+        move selected songs down by `n` lines, or up if `n` is negative; a
+        counted swap is a single move;
+        '''
+
+        beg, end = self.selected()
+        to = max(0, min(self.num - (end - beg), beg + n))
+        if to > beg:
+            self._move(beg, end, to)
+            self.line_down(to - beg)
+        elif to < beg:
+            self._move(beg, end, to)
+            self.line_up(beg - to)
+
+    def _rate_selected(self, rating):
+
+        '''
+        rate selected songs in visual mode, else current song;
+        '''
+
+        if self.mark is not None:
+            songs = self.queue[slice(*self.selected())]
+            self.mark = None
+        elif 0 <= self.cur and self.cur < len(self.items):
+            songs = [ self.items[self.cur] ]
+        else:
+            return
+        self.ctrl.rate([ song['file'] for song in songs ], rating)
+
+    def _toggle_lock(self):
+        self.auto_center = not self.auto_center
+
+    def _dblocate(self):
+        self.ipc['database-locate'] = self.items[self.sel]['file']
+
     def round0(self):
         super().round0()
 
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.top:
-            self.select_top()
-        elif self.ch == ks.mid:
-            self.select_mid()
-        elif self.ch == ks.bot:
-            self.select_bot()
-        elif self.ch == ks.first:
-            self.select_first()
-        elif self.ch == ks.last:
-            self.select_last()
-        elif self.ch == ks.locate:
-            self.locate(self.cur)
-        elif self.ch == ks.add:
-            self.mpc.add('')
-        elif self.ch == ks.clear:
-            self.mpc.clear()
-            self.num = self.beg = self.sel = self.cur = 0
-        elif self.ch == ks.delete:
-            if self.num > 0:
-                self.ctrl.batch.append(
-                    'deleteid({})'.format(self.items[self.sel]['id']))
-                self.items.pop(self.sel)
-                if self.sel < self.cur:
-                    self.cur -= 1
-                self.num -= 1
-                self.beg = self.clamp(self.beg)
-                self.sel = self.clamp(self.sel)
-                self.cur = self.clamp(self.cur)
-        elif self.ch == ks.swapdn:
-            if self.sel + 1 < self.num:
-                self.ctrl.batch.append(
-                    'swap({}, {})'.format(self.sel, self.sel + 1))
-                self.items[self.sel], self.items[self.sel + 1] = \
-                        self.items[self.sel + 1], self.items[self.sel]
-                if self.cur == self.sel:
-                    self.cur += 1
-                elif self.cur == self.sel + 1:
-                    self.cur -= 1
-                self.line_down()
-        elif self.ch == ks.swapup:
-            if self.sel > 0:
-                self.ctrl.batch.append(
-                    'swap({}, {})'.format(self.sel, self.sel - 1))
-                self.items[self.sel - 1], self.items[self.sel] = \
-                        self.items[self.sel], self.items[self.sel - 1]
-                if self.cur == self.sel - 1:
-                    self.cur += 1
-                elif self.cur == self.sel:
-                    self.cur -= 1
-                self.line_up()
-        elif self.ch == ks.shuffle:
-            self.mpc.shuffle()
-        elif self.ch == ks.play:
-            self.mpc.playid(self.items[self.sel]['id'])
-        elif self.ch in ksg.rate:
-            if conf.rate_song:
-                rating = {
-                    ks.rate1: 1,
-                    ks.rate2: 2,
-                    ks.rate3: 3,
-                    ks.rate4: 4,
-                    ks.rate5: 5,
-                }[self.ch]
-                if 0 <= self.cur and self.cur < len(self.items):
-                    song = self.items[self.cur]
-                    self.mpc.sticker_set('song', song['file'], 'rating', rating)
-                    song['rating'] = rating
-        elif self.ch == ks.unrate:
-            if conf.rate_song:
-                if 0 <= self.cur and self.cur < len(self.items):
-                    song = self.items[self.cur]
-                    try:
-                        self.mpc.sticker_delete('song', song['file'], 'rating')
-                    except mpd.CommandError as e:
-                        self.ipc['msg'] = str(e)
-                    else:
-                        song['rating'] = 0
-        elif self.ch in ksg.search:
-            self.search(self.name, self.ch)
-        elif self.ch == ks.lock:
-            self.auto_center = not self.auto_center
-        elif self.ch == ks.dblocate:
-            self.ipc['database-locate'] = self.items[self.sel]['file']
-
         ##  announce selected song;
         if self.num > 0:
             self.ipc['queue-selected'] = self.items[self.sel]
@@ -758,10 +1017,9 @@ class QueuePane(CursedPane):
 
         uri = self.ipc.get('queue-locate')
         if uri:
-            for i in range(len(self.items)):
-                if uri == self.items[i]['file']:
-                    self.locate(i)
-                    break
+            pos = self.queue.find_pos(uri)
+            if pos is not None:
+                self.locate(pos)
             else:
                 self.ipc['msg'] = 'Not found in playlist'
 
@@ -769,23 +1027,73 @@ class QueuePane(CursedPane):
         if self.auto_center:
             self.locate(self.cur)
 
+    def _elapsed(self):
+
+        '''
+        return elapsed time of current song;
+        '''
+
+        if self.status.get('state') in [ 'play', 'pause' ]:
+            return int(self.status.get('time', '0:0').split(':')[0])
+        return 0
+
+    def build_title(self):
+        total = self.queue.total()
+        if 0 <= self.cur < self.num:
+            remaining = total - self.queue.start_of(self.cur) - self._elapsed()
+        else:
+            remaining = total
+        return '{} [{} total, {} left]'.format(
+            self.name + (' (auto)' if self.auto_queue else ''),
+            format_time(str(total)) or '00:00',
+            format_time(str(max(0, remaining))) or '00:00')
+
+    def _build_eta(self, pos, now):
+
+        '''
+        build start time of a song after current song;
+        '''
+
+        if pos <= self.cur or self.status.get('state') != 'play':
+            return ''
+        eta = now + self.queue.start_of(pos) - self.queue.start_of(self.cur) \
+            - self._elapsed()
+        return time.strftime('%H:%M', time.localtime(eta))
+
+    def _render(self, item):
+
+        '''
+        render a row: `(title, time)`;
+        '''
+
+        title = item.get('title') or basename(item['file'])
+        title = fit(title, self.width - (24 if conf.queue_eta else 18))
+        tm = format_time(item['time'])
+        return title, tm
+
     def update(self):
+        sel_beg, sel_end = self.selected()
+        now = time.time()
+
         self.win.erase()
         for i in range(self.beg, min(self.beg + self.height, self.num)):
             item = self.items[i]
-            title = item.get('title') or basename(item['file'])
-            rating = item.get('rating', 0)
-            tm = format_time(item['time'])
+            title, tm = self.render_row(
+                item['id'], lambda: self._render(item))
+            rating = self.ctrl.ratings.get(item['file']) * '*'
 
             if i == self.cur:
                 self.win.attron(curses.A_BOLD)
-            if i == self.sel:
+            if sel_beg <= i < sel_end:
                 self.win.attron(curses.A_REVERSE)
             self.win.hline(i - self.beg, 0, ' ', self.width)
-            self.win.addnstr(i - self.beg, 0, title, self.width - 18)
-            self.win.addnstr(i - self.beg, self.width - 16, rating * '*', 5)
+            self.win.addstr(i - self.beg, 0, title)
+            self.win.addnstr(i - self.beg, self.width - 16, rating, 5)
+            if conf.queue_eta:
+                self.win.addstr(
+                    i - self.beg, self.width - 23, self._build_eta(i, now))
             self.win.insstr(i - self.beg, self.width - len(tm), tm)
-            if i == self.sel:
+            if sel_beg <= i < sel_end:
                 self.win.attroff(curses.A_REVERSE)
             if i == self.cur:
                 self.win.attroff(curses.A_BOLD)
@@ -804,135 +1112,180 @@ class DatabasePane(CursedPane):
 
         ##  current dir;
         self.dir = ''
+
+        ##  recent `lsinfo` results: `{dir: (items, {file: index})}`;
+        self._cache = LruCache(64)
+
+        ##  file index of current dir: `{file: index}`;
+        self._index = {}
+
+        ##  remembered cursor positions: `{dir: (beg, sel)}`;
+        self._pos = {}
+
         self.items = self._list_items()
 
+        self.handlers.update({
+            ks.parent   : self._chdir_parent,
+            ks.root     : lambda: self._chdir(''),
+            ks.play     : self._play,
+            ks.visual   : self.toggle_visual,
+            ks.add      : self._add,
+            ks.delete   : self._delete,
+            ks.update   : lambda: self.mpc.update(),
+            ks.dblocate : self._dblocate,
+        })
+        for rating, key in enumerate([ ks.unrate ] + ksg.rate):
+            self.handlers[key] = partial(self._rate, rating)
+        for key in ksg.search:
+            self.handlers[key] = lambda: self.search(self.name, self.ch)
+
     def _list_items(self, keep_pos=False):
         '''
         list contents of current dir;
 
         this method is called when current dir changes, or new items are added
-        or removed;
+        or removed; contents are taken from cache if possible;
 
         ## params
 
         keep_pos:bool
-        :   keep current position of display and selection;
+        :   keep current position of display and selection; otherwise, restore
+            remembered position in current dir;
         '''
 
-        items = self.mpc.lsinfo(self.dir)
-        items.insert(0, {'directory' : '..'})
+        listing = self._cache.get(self.dir)
+        if listing is None:
+            items = self.mpc.lsinfo(self.dir)
+            items.insert(0, {'directory' : '..'})
+            index = {
+                item['file']: i
+                for i, item in enumerate(items) if 'file' in item
+            }
+            listing = (items, index)
+            self._cache.put(self.dir, listing)
+        items, self._index = listing
         self.num = len(items)
-        if keep_pos:
-            self.beg = self.clamp(self.beg)
-            self.sel = self.clamp(self.sel)
-        else:
-            self.beg = 0
-            self.sel = 0
+        if not keep_pos:
+            self.beg, self.sel = self._pos.get(self.dir, (0, 0))
+            self.mark = None
+        self.beg = self.clamp(self.beg)
+        self.sel = self.clamp(self.sel)
         return items
 
-    def fetch(self):
-        super().fetch()
+    def _chdir(self, dir_):
 
-        ##  database is changed;
-        if 'database' in self.ipc.get('idle', []):
-            self.dir = ''
-            self.items = self._list_items()
-            self.ipc['msg'] = 'Database updated.'
+        '''
+        change current dir, remembering position in old dir;
+        '''
 
-    def round0(self):
-        super().round0()
+        self._pos[self.dir] = (self.beg, self.sel)
+        self.dir = dir_
+        self.items = self._list_items()
 
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.top:
-            self.select_top()
-        elif self.ch == ks.mid:
-            self.select_mid()
-        elif self.ch == ks.bot:
-            self.select_bot()
-        elif self.ch == ks.first:
-            self.select_first()
-        elif self.ch == ks.last:
-            self.select_last()
-        elif self.ch == ks.parent:
-            old_dir = self.dir
-            self.dir = dirname(self.dir)
-            self.items = self._list_items()
+    def _chdir_parent(self):
+
+        '''
+        change to parent dir and select the old dir;
+        '''
+
+        old_dir = self.dir
+        self._chdir(dirname(self.dir))
+        if self.items[self.sel].get('directory') != old_dir:
             for i in range(self.num):
                 if self.items[i].get('directory') == old_dir:
                     self.locate(i)
                     break
-        elif self.ch == ks.root:
+
+    def fetch(self):
+        super().fetch()
+
+        idle = self.ipc.get('idle', [])
+
+        ##  database is changed;
+        if 'database' in idle:
+            self._cache.clear()
+            self._pos.clear()
             self.dir = ''
             self.items = self._list_items()
-        elif self.ch == ks.play:
-            item = self.items[self.sel]
+            self.ipc['msg'] = 'Database updated.'
+
+        ##  stored playlists are changed; they are listed in root dir;
+        elif 'stored_playlist' in idle:
+            self._cache.pop('')
+            if self.dir == '':
+                self.items = self._list_items(keep_pos=True)
+
+    def _play(self):
+        item = self.items[self.sel]
+        if 'directory' in item:
+            uri = item['directory']
+            if uri == '..':
+                self._chdir_parent()
+            else:
+                self._chdir(uri)
+        elif 'file' in item:
+            self.ctrl.play_uri(item['file'])
+        elif 'playlist' in item:
+            name = item['playlist']
+            try:
+                self.mpc.load(name)
+            except mpd.CommandError as e:
+                self.ipc['msg'] = str(e).rsplit('} ')[1]
+            else:
+                self.ipc['msg'] = 'Playlist {} loaded'.format(name)
+
+    def _add(self):
+        uris = []
+        for item in self.items[slice(*self.selected())]:
             if 'directory' in item:
                 uri = item['directory']
-                if uri == '..':
-                    old_dir = self.dir
-                    self.dir = dirname(self.dir)
-                    self.items = self._list_items()
-                    for i in range(self.num):
-                        if self.items[i].get('directory') == old_dir:
-                            self.locate(i)
-                            break
-                else:
-                    self.dir = uri
-                    self.items = self._list_items()
             elif 'file' in item:
                 uri = item['file']
-                songs = self.mpc.playlistfind('file', uri)
-                if not songs:
-                    self.mpc.add(uri)
-                    songs = self.mpc.playlistfind('file', uri)
-                self.mpc.playid(songs[0]['id'])
-            elif 'playlist' in item:
-                name = item['playlist']
-                try:
-                    self.mpc.load(name)
-                except mpd.CommandError as e:
-                    self.ipc['msg'] = str(e).rsplit('} ')[1]
-                else:
-                    self.ipc['msg'] = 'Playlist {} loaded'.format(name)
-        elif self.ch == ks.add:
-            item = self.items[self.sel]
-            if 'directory' in item:
-                uri = item['directory']
             else:
-                uri = item['file']
-            if uri == '..':
-                self.mpc.add(dirname(self.dir))
-            else:
-                self.mpc.add(uri)
-        elif self.ch == ks.delete:
-            item = self.items[self.sel]
-            if 'playlist' in item:
-                name = item['playlist']
-                try:
-                    self.mpc.rm(name)
-                except mpd.CommandError as e:
-                    self.ipc['msg'] = str(e).rsplit('} ')[1]
-                else:
-                    self.ipc['msg'] = 'Playlist {} deleted'.format(name)
-                    self.items = self._list_items(keep_pos=True)
-        elif self.ch == ks.update:
-            self.mpc.update()
-        elif self.ch in ksg.search:
-            self.search(self.name, self.ch)
-        elif self.ch == ks.dblocate:
-            ##  locate a song in queue;
-            item = self.items[self.sel]
-            if 'file' in item:
-                self.ipc['queue-locate'] = item.get('file')
+                continue
+            uris.append(dirname(self.dir) if uri == '..' else uri)
+        self.mark = None
+        add_uris(self.mpc, uris, self.ctrl.cserver.chunk_size())
+
+    def _rate(self, rating):
+
+        '''
+        rate selected songs;
+        '''
+
+        self.ctrl.rate([
+            item['file'] for item in self.items[slice(*self.selected())]
+            if 'file' in item
+        ], rating)
+        self.mark = None
+
+    def _delete(self):
+        item = self.items[self.sel]
+        if 'playlist' in item:
+            name = item['playlist']
+            try:
+                self.mpc.rm(name)
+            except mpd.CommandError as e:
+                self.ipc['msg'] = str(e).rsplit('} ')[1]
             else:
-                self.ipc['msg'] = 'No song selected'
+                self.ipc['msg'] = 'Playlist {} deleted'.format(name)
+                self._cache.pop(self.dir)
+                self.items = self._list_items(keep_pos=True)
+
+    def _dblocate(self):
+
+        '''
+        locate selected song in queue;
+        '''
+
+        item = self.items[self.sel]
+        if 'file' in item:
+            self.ipc['queue-locate'] = item.get('file')
+        else:
+            self.ipc['msg'] = 'No song selected'
+
+    def round0(self):
+        super().round0()
 
         ##  record selected song;
         self.ipc['database-selected'] = self.items[self.sel].get('file')
@@ -944,20 +1297,24 @@ class DatabasePane(CursedPane):
         ##  using item parent dir as display dir, and search for the file;
         uri = self.ipc.get('database-locate')
         if uri:
-            self.dir = dirname(uri)
-            self.items = self._list_items()
-            for i in range(self.num):
-                if self.items[i].get('file') == uri:
-                    self.locate(i)
-                    break
+            self._chdir(dirname(uri))
+            pos = self._index.get(uri)
+            if pos is not None:
+                self.locate(pos)
             else:
                 self.ipc['msg'] = 'Not found in database'
 
         ##  if a playlist is saved, then rebuild item list;
         if self.ipc.get('playlist') == 'saved':
-            self.items = self._list_items(keep_pos=True)
+            self._cache.pop('')
+            if self.dir == '':
+                self.items = self._list_items(keep_pos=True)
 
     def update(self):
+        ##  queued songs are shown in bold;
+        queue = self.ctrl.queue_pane.queue
+        sel_beg, sel_end = self.selected()
+
         self.win.erase()
         for i in range(self.beg, min(self.num, self.beg + self.height)):
             item = self.items[i]
@@ -968,19 +1325,30 @@ class DatabasePane(CursedPane):
             elif 'playlist' in item:
                 t, uri = 'playlist', item['playlist']
 
-            if i == self.sel:
+            if sel_beg <= i < sel_end:
                 self.win.attron(curses.A_REVERSE)
             if t == 'directory':
                 self.win.attron(curses.color_pair(1) | curses.A_BOLD)
             elif t == 'playlist':
                 self.win.attron(curses.color_pair(2) | curses.A_BOLD)
+            elif uri in queue:
+                self.win.attron(curses.A_BOLD)
             self.win.hline(i - self.beg, 0, ' ', self.width)
-            self.win.insstr(i - self.beg, 0, basename(uri))
+            if t == 'file':
+                self.win.insstr(
+                    i - self.beg, 0, truncate(basename(uri), self.width - 6))
+                self.win.insstr(i - self.beg, self.width - 5,
+                    self.ctrl.ratings.get(uri) * '*')
+            else:
+                self.win.insstr(
+                    i - self.beg, 0, truncate(basename(uri), self.width))
             if t == 'directory':
                 self.win.attroff(curses.color_pair(1) | curses.A_BOLD)
             elif t == 'playlist':
                 self.win.attroff(curses.color_pair(2) | curses.A_BOLD)
-            if i == self.sel:
+            else:
+                self.win.attroff(curses.A_BOLD)
+            if sel_beg <= i < sel_end:
                 self.win.attroff(curses.A_REVERSE)
         self.win.noutrefresh()
 
@@ -999,16 +1367,27 @@ class LyricsPane(ScrollPane):
         ##  auto-center;
         self.auto_center = True
 
+        self.handlers.update({
+            ks.locate       : lambda: self.locate(self.cur),
+            ks.lock         : self._toggle_lock,
+            ks.savelyrics   : self._save_lyrics,
+        })
+
     def _save_lyrics(self):
         song = self.res.get('song')
         if song:
             title = song.get('title')
             artist = song.get('artist')
             basename = lrc_basename(title, artist)
-            if not isdir(conf.lyrics_dir):
-                os.makedirs(conf.lyrics_dir)
-            with open(join(conf.lyrics_dir, basename), 'wt') as fp:
-                fp.write(self.res.get('lyrics'))
+            try:
+                if not isdir(conf.lyrics_dir):
+                    os.makedirs(conf.lyrics_dir)
+                with open(join(conf.lyrics_dir, basename), 'wt') as fp:
+                    fp.write(self.res.get('lyrics'))
+                self.ctrl.lyrics_index.add(basename, artist, title)
+            except OSError as e:
+                self.ipc['msg'] = f'Lyrics saving failed: {e.strerror}'
+                return
             self.ipc['msg'] = f'Lyrics {basename} saved.'
         else:
             self.ipc['msg'] = 'Lyrics saving failed.'
@@ -1067,23 +1446,8 @@ class LyricsPane(ScrollPane):
                 ##  release lock;
                 self.itc_cond.release()
 
-    def round0(self):
-        super().round0()
-
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.locate:
-            self.locate(self.cur)
-        elif self.ch == ks.lock:
-            self.auto_center = not self.auto_center
-        elif self.ch == ks.savelyrics:
-            self._save_lyrics()
+    def _toggle_lock(self):
+        self.auto_center = not self.auto_center
 
     def round1(self):
         super().round1()
@@ -1117,210 +1481,404 @@ class ArtistAlbumPane(CursedPane):
         self._type = 'artist'
         self._artist = None
         self._album = None
+
+        ##  artist-album tree: `{artist: {album: [filter, ...]}}`, where each
+        ##  filter finds songs of the artist, without album; loaded on demand;
+        self._tree = None
+
+        ##  song list cache: `{(artist, album): [song, ...]}`;
+        self._songs = {}
+
         self.items = self._list_items()
 
+        self.handlers.update({
+            ks.parent   : self._parent,
+            ks.root     : self._root,
+            ks.play     : self._play,
+            ks.visual   : self.toggle_visual,
+            ks.add      : self._add,
+            ks.dblocate : self._dblocate,
+        })
+        for rating, key in enumerate([ ks.unrate ] + ksg.rate):
+            self.handlers[key] = partial(self._rate, rating)
+        for key in ksg.search:
+            self.handlers[key] = lambda: self.search(self.name, self.ch)
+
+    def _load_tree(self):
+
+        '''
+        load artist-album tree in one command list;
+
+        album names are grouped by album artist, so that albums with the same
+        name but from different artists are kept apart; songs without album
+        artist are grouped by artist instead;
+        '''
+
+        self.mpc.command_list_ok_begin()
+        self.mpc.list('album', 'group', 'albumartist')
+        self.mpc.list('album', 'albumartist', '', 'group', 'artist')
+        by_albumartist, by_artist = self.mpc.command_list_end()
+
+        tree = {}
+        for groups, tag in [
+                (by_albumartist, 'albumartist'), (by_artist, 'artist') ]:
+            for group in groups:
+                artist = group.get(tag, '')
+                if tag == 'albumartist':
+                    if not artist:
+                        continue
+                    filter_ = ('albumartist', artist)
+                else:
+                    filter_ = ('albumartist', '', 'artist', artist)
+                albums = group.get('album', [])
+                if isinstance(albums, str):
+                    albums = [ albums ]
+                for album in albums:
+                    filters = tree.setdefault(artist, {}).setdefault(album, [])
+                    if filter_ not in filters:
+                        filters.append(filter_)
+        return tree
+
+    def _filters(self, artist, album=None):
+
+        '''
+        return filters of songs of an artist, or of an album of an artist;
+        '''
+
+        albums = self._tree.get(artist, {})
+        if album is not None:
+            return [ f + ('album', album) for f in albums.get(album, []) ]
+        filters = []
+        for fs in albums.values():
+            filters += [ f for f in fs if f not in filters ]
+        return filters
+
     def _list_items(self):
+        if self._tree is None:
+            self._tree = self._load_tree()
+
         if self._type == 'artist':
-            items = self.mpc.list('artist')
+            items = sorted(self._tree)
         elif self._type == 'album':
-            items = self.mpc.list('album', self._artist) if self._artist else []
+            items = sorted(self._tree.get(self._artist, {}))
         elif self._type == 'song':
-            items = self.mpc.find('album', self._album) if self._album else []
-
+            key = (self._artist, self._album)
+            if key not in self._songs:
+                songs = []
+                for filter_ in self._filters(self._artist, self._album):
+                    songs += self.mpc.find(*filter_)
+                self._songs[key] = to_songs(songs)
+            items = self._songs[key]
+
+        self._rows.clear()
         self.num = len(items)
         self.beg = 0
         self.sel = 0
+        self.mark = None
         return items
 
     def fetch(self):
         super().fetch()
 
         if 'database' in self.ipc.get('idle', []):
+            self._tree = None
+            self._songs.clear()
             self._type = 'artist'
             self.items = self._list_items()
             self.ipc['msg'] = 'Database updated.'
 
-    def round0(self):
-        super().round0()
-
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.top:
-            self.select_top()
-        elif self.ch == ks.mid:
-            self.select_mid()
-        elif self.ch == ks.bot:
-            self.select_bot()
-        elif self.ch == ks.first:
-            self.select_first()
-        elif self.ch == ks.last:
-            self.select_last()
-        elif self.ch == ks.parent:
-            if self._type == 'artist':
-                pass
-            elif self._type == 'album':
-                self._type = 'artist'
-                self.items = self._list_items()
-                for i in range(self.num):
-                    if self.items[i] == self._artist:
-                        self.locate(i)
-                        break
-            elif self._type == 'song':
-                self._type = 'album'
-                self.items = self._list_items()
-                for i in range(self.num):
-                    if self.items[i] == self._album:
-                        self.locate(i)
-                        break
-        elif self.ch == ks.root:
+    def _parent(self):
+        if self._type == 'artist':
+            pass
+        elif self._type == 'album':
             self._type = 'artist'
             self.items = self._list_items()
-        elif self.ch == ks.play:
-            item = self.items[self.sel]
-            if self._type == 'artist':
-                self._artist = item
-                self._type = 'album'
-                self.items = self._list_items()
-            elif self._type == 'album':
-                self._album = item
-                self._type = 'song'
-                self.items = self._list_items()
-            elif self._type == 'song':
-                uri = item['file']
-                songs = self.mpc.playlistfind('file', uri)
-                if not songs:
-                    self.mpc.add(uri)
-                    songs = self.mpc.playlistfind('file', uri)
-                self.mpc.playid(songs[0]['id'])
-        elif self.ch == ks.add:
-            item = self.items[self.sel]
+            for i in range(self.num):
+                if self.items[i] == self._artist:
+                    self.locate(i)
+                    break
+        elif self._type == 'song':
+            self._type = 'album'
+            self.items = self._list_items()
+            for i in range(self.num):
+                if self.items[i] == self._album:
+                    self.locate(i)
+                    break
+
+    def _root(self):
+        self._type = 'artist'
+        self.items = self._list_items()
+
+    def _play(self):
+        item = self.items[self.sel]
+        if self._type == 'artist':
+            self._artist = item
+            self._type = 'album'
+            self.items = self._list_items()
+        elif self._type == 'album':
+            self._album = item
+            self._type = 'song'
+            self.items = self._list_items()
+        elif self._type == 'song':
+            self.ctrl.play_uri(item['file'])
+
+    def _add(self):
+        self.mpc.command_list_ok_begin()
+        for item in self.items[slice(*self.selected())]:
             if self._type == 'artist':
-                self.mpc.findadd('artist', item)
+                for filter_ in self._filters(item):
+                    self.mpc.findadd(*filter_)
             elif self._type == 'album':
-                self.mpc.findadd('album', item)
+                for filter_ in self._filters(self._artist, item):
+                    self.mpc.findadd(*filter_)
             elif self._type == 'song':
                 self.mpc.add(item['file'])
-        elif self.ch in ksg.search:
-            self.search(self.name, self.ch)
-        elif self.ch == ks.dblocate:
-            ##  locate a song in queue;
-            if self._type == 'song':
-                item = self.items[self.sel]
-                self.ipc['queue-locate'] = item.get('file')
-            else:
-                self.ipc['msg'] = 'No song selected'
+        self.mpc.command_list_end()
+        self.mark = None
+
+    def _rate(self, rating):
+
+        '''
+        rate selected songs;
+        '''
+
+        if self._type == 'song':
+            self.ctrl.rate([
+                item['file'] for item in self.items[slice(*self.selected())]
+            ], rating)
+            self.mark = None
+
+    def _dblocate(self):
+
+        '''
+        locate selected song in queue;
+        '''
+
+        if self._type == 'song':
+            item = self.items[self.sel]
+            self.ipc['queue-locate'] = item.get('file')
+        else:
+            self.ipc['msg'] = 'No song selected'
 
     def update(self):
+        ##  queued songs are shown in bold;
+        queue = self.ctrl.queue_pane.queue
+        sel_beg, sel_end = self.selected()
+
         self.win.erase()
         for i in range(self.beg, min(self.num, self.beg + self.height)):
             item = self.items[i]
-            if self._type in [ 'artist', 'album' ]:
-                title = item
+            if self._type == 'artist':
+                title = truncate(item or '[unknown artist]', self.width)
+            elif self._type == 'album':
+                title = truncate(item or '[unknown album]', self.width)
             elif self._type == 'song':
-                title = get_tag('title', item) or basename(item.get('file'))
+                title = self.render_row(i, lambda: truncate(
+                    get_tag('title', item) or basename(item.get('file')),
+                    self.width - 6))
 
-            if i == self.sel:
+            if sel_beg <= i < sel_end:
                 self.win.attron(curses.A_REVERSE)
             if self._type == 'artist':
                 self.win.attron(curses.color_pair(1) | curses.A_BOLD)
             elif self._type == 'album':
                 self.win.attron(curses.color_pair(2) | curses.A_BOLD)
+            elif item.get('file') in queue:
+                self.win.attron(curses.A_BOLD)
             self.win.hline(i - self.beg, 0, ' ', self.width)
             self.win.insstr(i - self.beg, 0, title)
+            if self._type == 'song':
+                self.win.insstr(i - self.beg, self.width - 5,
+                    self.ctrl.ratings.get(item.get('file')) * '*')
             if self._type == 'artist':
                 self.win.attroff(curses.color_pair(1) | curses.A_BOLD)
             elif self._type == 'album':
                 self.win.attroff(curses.color_pair(2) | curses.A_BOLD)
-            if i == self.sel:
+            else:
+                self.win.attroff(curses.A_BOLD)
+            if sel_beg <= i < sel_end:
                 self.win.attroff(curses.A_REVERSE)
         self.win.noutrefresh()
 
 class SearchPane(CursedPane):
 
     '''
-    search in database;
+    search in database; list top rated songs; search in saved lyrics;
     '''
 
     def __init__(self, name, win, ctrl):
         super().__init__(name, win, ctrl)
         self.items = []
 
-    def _list_items(self, search_kw):
+        ##  last search query: `(name, value)`;
+        self._query = None
+
+        self.handlers.update({
+            ks.search   : self._search,
+            ks.play     : self._play,
+            ks.visual   : self.toggle_visual,
+            ks.add      : self._add,
+            ks.addall   : self._add_all,
+            ks.dblocate : self._dblocate,
+            ks.toprated : self._top_rated,
+            ks.searchlyrics : self._search_lyrics,
+            ks.locate   : self._locate,
+        })
+        for rating, key in enumerate([ ks.unrate ] + ksg.rate):
+            self.handlers[key] = partial(self._rate, rating)
+        for key in ksg.search:
+            self.handlers[key] = lambda: self.search(self.name, self.ch)
+
+    def _find(self, search_kw):
         try:
             name, value = search_kw.split('=', 1)
-            items = self.mpc.find(name, value) or []
+            items = to_songs(self.mpc.find(name, value) or [])
+            self._query = (name, value)
             self.ipc['msg'] = 'Found {} results'.format(len(items))
-        except mpd.CommandError:
+        except (ValueError, mpd.CommandError):
             items = []
+            self._query = None
             self.ipc['msg'] = 'Search query format: {key}={value}'
+        return items
 
+    def _list_items(self, items):
+        self._rows.clear()
         self.num = len(items)
         self.beg = 0
         self.sel = 0
+        self.mark = None
         return items
 
-    def round0(self):
-        super().round0()
+    def _search(self):
+        self.items = self._list_items(
+            self._find(self.ctrl.message_pane.getstr('Database Search')))
 
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.top:
-            self.select_top()
-        elif self.ch == ks.mid:
-            self.select_mid()
-        elif self.ch == ks.bot:
-            self.select_bot()
-        elif self.ch == ks.first:
-            self.select_first()
-        elif self.ch == ks.last:
-            self.select_last()
-        elif self.ch == ks.search:
-            self.items = self._list_items(
-                self.ctrl.message_pane.getstr('Database Search'))
-        elif self.ch == ks.play:
-            item = self.items[self.sel]
-            uri = item['file']
-            songs = self.mpc.playlistfind('file', uri)
-            if not songs:
-                self.mpc.add(uri)
-                songs = self.mpc.playlistfind('file', uri)
-            self.mpc.playid(songs[0]['id'])
-        elif self.ch == ks.add:
+    def _find_each(self, queries):
+
+        '''
+        run `find` for each query, in command lists; return found songs;
+        '''
+
+        size = self.ctrl.cserver.chunk_size()
+        items = []
+        for i in range(0, len(queries), size):
+            cmds = [ ('find', query) for query in queries[i:i + size] ]
+            results, errors = send_commands(self.mpc, cmds)
+            for songs in results:
+                items.extend(to_songs(songs or []))
+        return items
+
+    def _search_lyrics(self):
+
+        '''
+        find songs whose saved lyrics contain a line; lyrics index is updated
+        first, so that files saved since last search are found;
+        '''
+
+        query = self.ctrl.message_pane.getstr('Lyrics Search')
+        index = self.ctrl.lyrics_index
+        try:
+            index.update()
+        except OSError as e:
+            self.ipc['msg'] = 'Lyrics index failed: {}'.format(e.strerror)
+            return
+        hits = index.search(query)
+        items = self._find_each([
+            [ 'artist', artist, 'title', title ] for artist, title, line in hits
+        ])
+        self._query = None
+        self.ipc['msg'] = 'Found {} songs in {} lyrics'.format(
+            len(items), len(hits))
+        self.items = self._list_items(items)
+
+    def _top_rated(self):
+
+        '''
+        list rated songs, highest rating first; the list is taken from rating
+        index and sorted locally; tags are fetched in command lists;
+        '''
+
+        items = self._find_each([
+            [ 'file', uri ] for uri in self.ctrl.ratings.top()
+        ])
+        items.sort(key=lambda song: -self.ctrl.ratings.get(song['file']))
+        self._query = None
+        self.ipc['msg'] = 'Found {} rated songs'.format(len(items))
+        self.items = self._list_items(items)
+
+    def _play(self):
+        if self.sel < self.num:
+            self.ctrl.play_uri(self.items[self.sel]['file'])
+
+    def _add(self):
+        add_uris(self.mpc, [
+            item['file'] for item in self.items[slice(*self.selected())]
+        ], self.ctrl.cserver.chunk_size())
+        self.mark = None
+
+    def _add_all(self):
+
+        '''
+        add all results on server side;
+        '''
+
+        if self._query:
+            self.mpc.findadd(*self._query)
+
+    def _rate(self, rating):
+
+        '''
+        rate selected songs;
+        '''
+
+        self.ctrl.rate([
+            item['file'] for item in self.items[slice(*self.selected())]
+        ], rating)
+        self.mark = None
+
+    def _locate(self):
+
+        '''
+        locate selected song in database;
+        '''
+
+        if self.sel < self.num:
+            self.ipc['database-locate'] = self.items[self.sel]['file']
+        else:
+            self.ipc['msg'] = 'No song selected'
+
+    def _dblocate(self):
+
+        '''
+        locate selected song in queue;
+        '''
+
+        if self.sel < self.num:
             item = self.items[self.sel]
-            self.mpc.add(item['file'])
-        elif self.ch in ksg.search:
-            self.search(self.name, self.ch)
-        elif self.ch == ks.dblocate:
-            ##  locate a song in queue;
-            if self.sel < self.num:
-                item = self.items[self.sel]
-                self.ipc['queue-locate'] = item.get('file')
-            else:
-                self.ipc['msg'] = 'No song selected'
+            self.ipc['queue-locate'] = item.get('file')
+        else:
+            self.ipc['msg'] = 'No song selected'
 
     def update(self):
+        ##  queued songs are shown in bold;
+        queue = self.ctrl.queue_pane.queue
+        sel_beg, sel_end = self.selected()
+
         self.win.erase()
         for i in range(self.beg, min(self.beg + self.height, self.num)):
             item = self.items[i]
-            title = get_tag('title', item) or basename(item.get('file'))
+            title = self.render_row(i, lambda: truncate(
+                get_tag('title', item) or basename(item.get('file')),
+                self.width - 6))
+            attr = curses.A_BOLD if item.get('file') in queue else 0
+            rating = self.ctrl.ratings.get(item.get('file')) * '*'
 
-            if i == self.sel:
+            if sel_beg <= i < sel_end:
                 self.win.attron(curses.A_REVERSE)
             self.win.hline(i - self.beg, 0, ' ', self.width)
-            self.win.insstr(i - self.beg, 0, title)
-            if i == self.sel:
+            self.win.insstr(i - self.beg, 0, title, attr)
+            self.win.insstr(i - self.beg, self.width - 5, rating, attr)
+            if sel_beg <= i < sel_end:
                 self.win.attroff(curses.A_REVERSE)
         self.win.noutrefresh()
 
@@ -1344,8 +1902,11 @@ class InfoPane(ScrollPane):
         ##  selected in database;
         self._sid = {}
 
-        ##  database.sel's uri cache;
-        self._dburi = None
+        ##  song info of database uris: `{uri: song}`;
+        self._sid_cache = LruCache(256)
+
+        ##  key of current info; info is rebuilt only when key changes;
+        self._key = None
 
         self.lines = [
             ['head', 'currently playing'    , ''],
@@ -1400,31 +1961,62 @@ class InfoPane(ScrollPane):
             'songs', 'artists', 'albums', 'uptime', 'playtime', 'db_playtime',
             'db_update',
         ]
+        self.lines_d = self.lines
+        self.num = len(self.lines_d)
 
-    def round0(self):
-        super().round0()
+    def _lookup(self, uri):
+
+        '''
+        look up song info of a database uri; return `None` if not available;
+
+        results are cached by uri; lookups are skipped in idle state, and done
+        on a later event;
+        '''
 
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
+        if not uri:
+            return {}
+        sid = self._sid_cache.get(uri)
+        if sid is None and not self.ctrl.idle:
+            try:
+                sid = Song(self.mpc.listallinfo(uri)[0])
+            except (mpd.CommandError, IndexError):
+                sid = {}
+            self._sid_cache.put(uri, sid)
+        return sid
+
+    def fetch(self):
+        super().fetch()
+
+        if 'database' in self.ipc.get('idle', []):
+            self._sid_cache.clear()
 
     def round1(self):
         super().round1()
 
+        ##  info is only built when this pane is shown;
+        if self != self.ctrl.cpane:
+            return
+
         ##  get info about songs;
-        self._cp = self.currentsong
-        self._siq = self.ipc.get('queue-selected', {})
-        try:
-            uri = self.ipc.get('database-selected', {})
-            if uri and not self.ctrl.idle:
-                self._sid = self.mpc.listallinfo(uri)[0]
-        except (mpd.CommandError, IndexError):
-            self._sid = {}
+        cp = self.currentsong
+        siq = self.ipc.get('queue-selected', {})
+        uri = self.ipc.get('database-selected')
+        sid = self._lookup(uri)
+
+        ##  skip building if nothing changed; tags of a song may change while
+        ##  its id is kept, which changes playlist version;
+        key = (
+            cp.get('id'),
+            cp.get('title'),
+            siq.get('id'),
+            self.status.get('playlist'),
+            uri if sid is not None else None,
+            tuple(self.stats.get(k) for k in self._stats_keys),
+        )
+        if key == self._key:
+            return
+        self._key = key
+        self._cp, self._siq, self._sid = cp, siq, sid or {}
 
         ##  build lists;
         cp_list = [
@@ -1499,6 +2091,10 @@ class OutputPane(CursedPane):
         super().__init__(name, win, ctrl)
         self.outputs = []
 
+        self.handlers.update({
+            ks.toggle   : self._toggle,
+        })
+
     def fetch(self):
         super().fetch()
 
@@ -1507,27 +2103,16 @@ class OutputPane(CursedPane):
         self.beg = self.clamp(self.beg)
         self.sel = self.clamp(self.sel)
 
-    def round0(self):
-        super().round0()
-
-        if self.ch == ks.linedn:
-            self.line_down()
-        elif self.ch == ks.lineup:
-            self.line_up()
-        elif self.ch == ks.pagedn:
-            self.page_down()
-        elif self.ch == ks.pageup:
-            self.page_up()
-        elif self.ch == ks.toggle:
-            output = self.outputs[self.sel]
-            output_id = int(output['outputid'])
-            output_enabled = int(output['outputenabled'])
-            if output_enabled:
-                self.mpc.disableoutput(output_id)
-                self.outputs[self.sel]['outputenabled'] = '0'
-            else:
-                self.mpc.enableoutput(output_id)
-                self.outputs[self.sel]['outputenabled'] = '1'
+    def _toggle(self):
+        output = self.outputs[self.sel]
+        output_id = int(output['outputid'])
+        output_enabled = int(output['outputenabled'])
+        if output_enabled:
+            self.mpc.disableoutput(output_id)
+            self.outputs[self.sel]['outputenabled'] = '0'
+        else:
+            self.mpc.enableoutput(output_id)
+            self.outputs[self.sel]['outputenabled'] = '1'
 
     def update(self):
         self.win.erase()
@@ -1544,3 +2129,305 @@ class OutputPane(CursedPane):
                 self.win.attroff(curses.A_REVERSE)
         self.win.noutrefresh()
 
+
+class FleetPane(CursedPane):
+
+    '''
+    display state, volume and current song of all servers;
+
+    servers other than the current one are shown from their cached state,
+    which is updated by their idle events;
+    '''
+
+    def __init__(self, name, win, ctrl):
+        super().__init__(name, win, ctrl)
+        self.items = self.ctrl.servers
+        self.num = len(self.items)
+
+        self.handlers.update({
+            ks.play     : self._switch,
+        })
+
+    def _switch(self):
+        self.ipc['server'] = self.items[self.sel]
+
+    def _render(self, server):
+        if server is self.ctrl.cserver:
+            status, song = self.status, self.currentsong
+        else:
+            status, song = server.status, server.currentsong
+        title = get_tag('title', song) or basename(song.get('file', ''))
+        if not server.connected:
+            status = { 'state': 'down' }
+        return '{} {:6s} {:>4s} {:>6s}  {}'.format(
+            fit(server.name, 16),
+            status.get('state', ''),
+            status.get('volume', '-1') + '%',
+            '{:.1f}ms'.format(1000 * server.rtt),
+            truncate(title, max(0, self.width - 37)),
+        )
+
+    def update(self):
+        self.win.erase()
+        for i in range(self.beg, min(self.num, self.beg + self.height)):
+            server = self.items[i]
+            attr = curses.A_BOLD if server is self.ctrl.cserver else 0
+            if i == self.sel:
+                attr |= curses.A_REVERSE
+            self.win.attron(attr)
+            self.win.hline(i - self.beg, 0, ' ', self.width)
+            self.win.insstr(i - self.beg, 0, self._render(server))
+            self.win.attroff(attr)
+        self.win.noutrefresh()
+
+class PlaylistPane(CursedPane):
+
+    '''
+    display stored playlists and their songs;
+
+    songs of a playlist are listed by uri when it is opened; their tags are
+    fetched lazily, in blocks, only for blocks which are shown; contents are
+    cached by playlist name and last-modified time, so that an unchanged
+    playlist is opened again without fetching; playlists are listed again on
+    `stored_playlist` idle events;
+    '''
+
+    ##  number of songs per fetched block;
+    block = 256
+
+    def __init__(self, name, win, ctrl):
+        super().__init__(name, win, ctrl)
+
+        ##  name of opened playlist; `None` if playlists are listed;
+        self.playlist = None
+
+        ##  playlists, as returned by `listplaylists`, sorted by name;
+        self.playlists = []
+
+        ##  playlist contents: `{(name, last_modified): (uris, {block: songs})}`;
+        self._cache = LruCache(16)
+
+        ##  contents of opened playlist;
+        self._uris = []
+        self._blocks = {}
+
+        ##  `listplaylistinfo` takes a range (mpd 0.24 and later);
+        self._windowed = True
+
+        self._list_playlists()
+        self.items = self._list_items()
+
+        self.handlers.update({
+            ks.parent   : self._parent,
+            ks.root     : self._parent,
+            ks.play     : self._play,
+            ks.visual   : self.toggle_visual,
+            ks.add      : self._add,
+            ks.delete   : self._delete,
+        })
+        for key in ksg.search:
+            self.handlers[key] = lambda: self.search(self.name, self.ch)
+
+    def _list_playlists(self):
+        self.playlists = sorted(
+            self.mpc.listplaylists(), key=lambda pl: pl['playlist'])
+
+    def _key(self, name):
+
+        '''
+        return cache key of a playlist; `None` if there is no such playlist;
+        '''
+
+        for pl in self.playlists:
+            if pl['playlist'] == name:
+                return (name, pl.get('last-modified'))
+        return None
+
+    def _edited(self, name):
+
+        '''
+        drop cached contents of a playlist edited by this pane, and list again;
+
+        last-modified time has 1s resolution, so it may not change when the
+        playlist is edited twice in a second;
+        '''
+
+        for key in self._cache.keys():
+            if key[0] == name:
+                self._cache.pop(key)
+        self._list_playlists()
+        if self.playlist is not None and self._key(self.playlist) is None:
+            self.playlist = None
+        self.items = self._list_items(keep_pos=True)
+
+    def _list_items(self, keep_pos=False):
+
+        '''
+        list playlists, or songs of opened playlist;
+        '''
+
+        if self.playlist is None:
+            items = self.playlists
+        else:
+            key = self._key(self.playlist)
+            contents = self._cache.get(key)
+            if contents is None:
+                contents = (self.mpc.listplaylist(self.playlist), {})
+                self._cache.put(key, contents)
+            self._uris, self._blocks = contents
+            items = self._uris
+
+        self._rows.clear()
+        self.num = len(items)
+        if not keep_pos:
+            self.beg = 0
+            self.sel = 0
+            self.mark = None
+        self.beg = self.clamp(self.beg)
+        self.sel = self.clamp(self.sel)
+        return items
+
+    def _load_block(self, b):
+
+        '''
+        fetch tags of songs in block `b` of opened playlist;
+        '''
+
+        beg = b * self.block
+        end = min(len(self._uris), beg + self.block)
+        if self._windowed:
+            try:
+                self._blocks[b] = self.mpc.listplaylistinfo(
+                    self.playlist, (beg, end))
+                return
+            except mpd.CommandError:
+                self._windowed = False
+
+        ##  old server: fetch all blocks at once;
+        songs = self.mpc.listplaylistinfo(self.playlist)
+        for i in range(0, len(songs), self.block):
+            self._blocks[i // self.block] = songs[i:i + self.block]
+
+    def _song(self, pos):
+
+        '''
+        return song at given position of opened playlist; `None` if its block
+        is not fetched yet;
+        '''
+
+        songs = self._blocks.get(pos // self.block)
+        if songs is None or pos % self.block >= len(songs):
+            return None
+        return songs[pos % self.block]
+
+    def fetch(self):
+        super().fetch()
+
+        if 'stored_playlist' in self.ipc.get('idle', []):
+            self._list_playlists()
+
+            ##  drop contents of changed playlists;
+            keys = { (pl['playlist'], pl.get('last-modified'))
+                for pl in self.playlists }
+            for key in self._cache.keys():
+                if key not in keys:
+                    self._cache.pop(key)
+
+            if self.playlist is not None and self._key(self.playlist) is None:
+                self.playlist = None
+            self.items = self._list_items(keep_pos=True)
+
+    def round1(self):
+        super().round1()
+
+        ##  fetch shown blocks; fetches are skipped in idle state, and done on
+        ##  a later event;
+        if self != self.ctrl.cpane or self.playlist is None or self.ctrl.idle:
+            return
+        end = min(self.num, self.beg + self.height)
+        for b in range(self.beg // self.block, (end - 1) // self.block + 1):
+            if b not in self._blocks:
+                self._load_block(b)
+                self._rows.clear()
+
+    def _parent(self):
+        if self.playlist is not None:
+            name, self.playlist = self.playlist, None
+            self.items = self._list_items()
+            for i in range(self.num):
+                if self.items[i]['playlist'] == name:
+                    self.locate(i)
+                    break
+
+    def _play(self):
+        if not self.num:
+            return
+        if self.playlist is None:
+            self.playlist = self.items[self.sel]['playlist']
+            self.items = self._list_items()
+        else:
+            self.ctrl.play_uri(self.items[self.sel])
+
+    def _add(self):
+        if not self.num:
+            return
+        beg, end = self.selected()
+        self.mpc.command_list_ok_begin()
+        if self.playlist is None:
+            for pl in self.items[beg:end]:
+                self.mpc.load(pl['playlist'])
+        else:
+            self.mpc.load(self.playlist, (beg, end))
+        self.mpc.command_list_end()
+        self.mark = None
+
+    def _delete(self):
+        if not self.num:
+            return
+        beg, end = self.selected()
+        try:
+            if self.playlist is None:
+                name = self.items[self.sel]['playlist']
+                self.mpc.rm(name)
+                self.ipc['msg'] = 'Playlist {} deleted'.format(name)
+            else:
+                name = self.playlist
+                ##  delete from last, so that positions dont shift;
+                self.mpc.command_list_ok_begin()
+                for pos in range(end - 1, beg - 1, -1):
+                    self.mpc.playlistdelete(self.playlist, pos)
+                self.mpc.command_list_end()
+        except mpd.CommandError as e:
+            self.ipc['msg'] = str(e).rsplit('} ')[1]
+        self.mark = None
+        self._edited(name)
+
+    def _render(self, i):
+        if self.playlist is None:
+            return truncate(self.items[i]['playlist'], self.width)
+        song = self._song(i)
+        if song is None:
+            return truncate(basename(self.items[i]), self.width)
+        title = get_tag('title', song) or basename(song['file'])
+        artist = get_tag('artist', song)
+        return truncate(
+            '{} - {}'.format(artist, title) if artist else title, self.width)
+
+    def update(self):
+        ##  queued songs are shown in bold;
+        queue = self.ctrl.queue_pane.queue
+        sel_beg, sel_end = self.selected()
+
+        self.win.erase()
+        for i in range(self.beg, min(self.num, self.beg + self.height)):
+            row = self.render_row(i, lambda: self._render(i))
+            attr = curses.A_REVERSE if sel_beg <= i < sel_end else 0
+            if self.playlist is None:
+                attr |= curses.color_pair(2) | curses.A_BOLD
+            elif self.items[i] in queue:
+                attr |= curses.A_BOLD
+            self.win.attron(attr)
+            self.win.hline(i - self.beg, 0, ' ', self.width)
+            self.win.insstr(i - self.beg, 0, row)
+            self.win.attroff(attr)
+        self.win.noutrefresh()
@@ -8,7 +8,6 @@ from os.path import isdir
 from os.path import join
 from threading import Thread
 
-from ncmpy import ttplyrics
 from ncmpy.config import conf
 from ncmpy.util import lrc_basename
 
@@ -49,6 +48,10 @@ class LyricsThread(Thread):
         fetch remote lyrics;
         '''
 
+        ##  import on demand; `ttplyrics` pulls in `urllib.request` and
+        ##  `xml.etree.ElementTree`, which are slow to import;
+        from ncmpy import ttplyrics
+
         return ttplyrics.fetch_lyrics(artist, title)
 
     def _fetch_default(self, artist, title):
@@ -19,129 +19,182 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
 
-import sys
-import locale
-import codecs
-from urllib.request import urlopen
+'''
+ttplyrics module;
+
+client of ttplayer lyrics server; a search returns candidate songs as `<lrc>`
+elements; lyrics of a candidate are downloaded by its id and a code computed
+from its id, artist and title;
+'''
+
 from urllib.request import Request
+from urllib.request import urlopen
+from xml.etree.ElementTree import ParseError
+from xml.etree.ElementTree import XMLPullParser
 import random
-from xml.dom.minidom import parse, parseString
+import sys
+
+##  lyrics server;
+server = 'http://ttlrcct2.qianqian.com/dll/lyricsvr.dll'
+
+##  request headers;
+headers = {
+    'User-agent': 'Mozilla/4.0 (compatible; MSIE 6.0; Windows NT 5.1)',
+}
+
+##  number of candidates tried before giving up;
+max_candidates = 4
+
+##  bytes read from a response at a time;
+read_size = 4096
 
 def CodeFunc(Id, data):
-    length = len(data)
 
-    tmp2=0
-    tmp3=0
+    '''
+    compute download code of a candidate from its id and utf-8 encoded
+    `artist + title`;
 
-    tmp1 = (Id & 0x0000FF00) >> 8							#右移8位后为0x0000015F
-                                                            #tmp1 0x0000005F
-    if ( (Id & 0x00FF0000) == 0 ):
-        tmp3 = 0x000000FF & ~tmp1							#CL 0x000000E7
+    bytes are read as signed chars in one go with a memoryview cast; each
+    hash step is reduced to 32 bits once, instead of once per operation;
+    '''
+
+    M = 0xFFFFFFFF
+
+    tmp1 = (Id & 0x0000FF00) >> 8
+    if (Id & 0x00FF0000) == 0:
+        tmp3 = 0x000000FF & ~tmp1
+    else:
+        tmp3 = 0x000000FF & ((Id & 0x00FF0000) >> 16)
+    tmp3 = tmp3 | ((0x000000FF & Id) << 8)
+    tmp3 = tmp3 << 8
+    tmp3 = tmp3 | (0x000000FF & tmp1)
+    tmp3 = tmp3 << 8
+    if (Id & 0xFF000000) == 0:
+        tmp3 = tmp3 | (0x000000FF & (~Id))
     else:
-        tmp3 = 0x000000FF & ((Id & 0x00FF0000) >> 16)		#右移16位后为0x00000001
-
-    tmp3 = tmp3 | ((0x000000FF & Id) << 8)					#tmp3 0x00001801
-    tmp3 = tmp3 << 8										#tmp3 0x00180100
-    tmp3 = tmp3 | (0x000000FF & tmp1)						#tmp3 0x0018015F
-    tmp3 = tmp3 << 8										#tmp3 0x18015F00
-    if ( (Id & 0xFF000000) == 0 ) :
-        tmp3 = tmp3 | (0x000000FF & (~Id))					#tmp3 0x18015FE7
-    else :
-        tmp3 = tmp3 | (0x000000FF & (Id >> 24))			#右移24位后为0x00000000
-
-    #tmp3	18015FE7
-
-    i=length-1
-    while(i >= 0):
-        char = (data[i])
-        if char >= 0x80:
-            char = char - 0x100
-        tmp1 = (char + tmp2) & 0x00000000FFFFFFFF
-        tmp2 = (tmp2 << (i%2 + 4)) & 0x00000000FFFFFFFF
-        tmp2 = (tmp1 + tmp2) & 0x00000000FFFFFFFF
-        #tmp2 = ((data[i])) + tmp2 + ((tmp2 << (i%2 + 4)) & 0x00000000FFFFFFFF)
-        i -= 1
-
-    #tmp2 88203cc2
-    i=0
-    tmp1=0
-    while(i<=length-1):
-        char = (data[i])
-        if char >= 128:
-            char = char - 256
-        tmp7 = (char + tmp1) & 0x00000000FFFFFFFF
-        tmp1 = (tmp1 << (i%2 + 3)) & 0x00000000FFFFFFFF
-        tmp1 = (tmp1 + tmp7) & 0x00000000FFFFFFFF
-        #tmp1 = ((data[i])) + tmp1 + ((tmp1 << (i%2 + 3)) & 0x00000000FFFFFFFF)
-        i += 1
-
-    #EBX 5CC0B3BA
-
-    #EDX = EBX | Id
-    #EBX = EBX | tmp3
-    tmp1 = (((((tmp2 ^ tmp3) & 0x00000000FFFFFFFF) + (tmp1 | Id)) & 0x00000000FFFFFFFF) * (tmp1 | tmp3)) & 0x00000000FFFFFFFF
-    tmp1 = (tmp1 * (tmp2 ^ Id)) & 0x00000000FFFFFFFF
+        tmp3 = tmp3 | (0x000000FF & (Id >> 24))
+
+    chars = memoryview(bytes(data)).cast('b').tolist()
+
+    ##  backward hash; shift is 4 at even index and 5 at odd index;
+    tmp2 = 0
+    for i in range(len(chars) - 1, -1, -1):
+        tmp2 = (chars[i] + tmp2 + (tmp2 << (i % 2 + 4))) & M
+
+    ##  forward hash; shift is 3 at even index and 4 at odd index;
+    tmp1 = 0
+    for i, char in enumerate(chars):
+        tmp1 = (char + tmp1 + (tmp1 << (i % 2 + 3))) & M
+
+    tmp1 = ((((tmp2 ^ tmp3) + (tmp1 | Id)) & M) * (tmp1 | tmp3)) & M
+    tmp1 = (tmp1 * (tmp2 ^ Id)) & M
 
     if tmp1 > 0x80000000:
         tmp1 = tmp1 - 0x100000000
     return tmp1
 
 def EncodeArtTit(str):
-    rtn = ''
-    str = str.encode('UTF-16')[2:]
-    for i in range(len(str)):
-        rtn += '%02x' % (str[i])
 
-    return rtn
+    '''
+    encode artist or title as hex of its utf-16le bytes;
+    '''
 
-def fetch_lyrics(artist, title):
-    if artist is None:
-        artist = ''
-    else:
-        artist = artist.replace(' ', '').lower()
-    if title is None:
-        title = ''
-    else:
-        title = title.replace(' ', '').lower()
+    return str.encode('utf-16-le').hex()
 
-    # fixed headers
-    headers =  {'User-agent' : 'Mozilla/4.0 (compatible; MSIE 6.0; Windows NT 5.1)'}
+def normalize(str):
+
+    '''
+    normalize artist or title for search and match;
+    '''
+
+    return (str or '').replace(' ', '').lower()
+
+def parse_candidates(fp):
+
+    '''
+    parse a search response incrementally; return `[(id, artist, title),
+    ...]` of its `<lrc>` elements, in response order;
+
+    the response is fed to a pull parser in chunks; `<lrc>` elements are read
+    on start and cleared on end, so no tree is built;
+    '''
+
+    parser = XMLPullParser(events=('start', 'end'))
+    candidates = []
+    while True:
+        chunk = fp.read(read_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if elem.tag != 'lrc':
+                continue
+            if event == 'start':
+                id = elem.get('id', '')
+                if id.isdigit():
+                    candidates.append((
+                        int(id), elem.get('artist', ''), elem.get('title', ''),
+                    ))
+            else:
+                elem.clear()
+    parser.close()
+    return candidates
+
+def rank_candidates(candidates, artist, title):
+
+    '''
+    sort candidates so that those matching artist and title come first; order
+    is kept otherwise;
+    '''
+
+    def key(candidate):
+        return (
+            normalize(candidate[2]) != title,
+            normalize(candidate[1]) != artist,
+        )
+
+    return sorted(candidates, key=key)
+
+def _get(url, timeout):
+    return urlopen(Request(url, None, headers), timeout=timeout)
+
+def fetch_lyrics(artist, title, timeout=10):
+
+    '''
+    fetch lyrics of a song;
+
+    candidates are tried in rank order, up to `max_candidates`, until one has
+    lyrics;
+    '''
+
+    artist = normalize(artist)
+    title = normalize(title)
 
     try:
-        url = 'http://ttlrcct2.qianqian.com/dll/lyricsvr.dll?sh?Artist={}&Title={}&Flags=0'.format(
-                EncodeArtTit(artist.replace(' ','').lower()),
-                EncodeArtTit(title.replace(' ','').lower()),
-                )
-        req = Request(url, None, headers)
-        handle = urlopen(req)
+        url = '{}?sh?Artist={}&Title={}&Flags=0'.format(
+            server, EncodeArtTit(artist), EncodeArtTit(title))
+        with _get(url, timeout) as handle:
+            candidates = parse_candidates(handle)
     except IOError:
         return '[00:00.00]Lyrics fetching failed.'
-    else:
-        dom = parseString(handle.read())
-        list = dom.getElementsByTagName('lrc')
-        li = []
-        for node in list:
-            li.append((node.getAttribute('id'),node.getAttribute('artist'),node.getAttribute('title')))
-
-        # only use the first element
-        if not li:
-            return '[00:00.00]Lyrics not found.'
-        li = li[0]
-
+    except ParseError:
+        return '[00:00.00]Lyrics not found.'
+
+    candidates = rank_candidates(candidates, artist, title)
+    for id, cartist, ctitle in candidates[:max_candidates]:
+        url = '{}?dl?Id={}&Code={}&uid=01&mac={:012x}'.format(
+            server, id,
+            CodeFunc(id, (cartist + ctitle).encode('utf-8')),
+            random.randint(0, 0xFFFFFFFFFFFF),
+        )
         try:
-            url = 'http://ttlrcct2.qianqian.com/dll/lyricsvr.dll?dl?Id=%d&Code=%d&uid=01&mac=%012x' % (
-                    int(li[0]),
-                    CodeFunc(int(li[0]), (li[1] + li[2]).encode('UTF-8')),
-                    random.randint(0,0xFFFFFFFFFFFF)
-                    )
-            req = Request(url, None, headers)
-            handle = urlopen(req)
-            # and open it to return a handle on the url
+            with _get(url, timeout) as handle:
+                lyrics = handle.read().decode('utf-8', 'replace')
         except IOError:
-            return '[00:00.00]Lyrics not found.'
-        else:
-            return handle.read().decode()
+            continue
+        if lyrics.strip():
+            return lyrics
+    return '[00:00.00]Lyrics not found.'
 
 if __name__ == '__main__':
     print(fetch_lyrics(sys.argv[1], sys.argv[2]))
-
@@ -4,8 +4,92 @@
 util module;
 '''
 
+from collections import OrderedDict
+import mpd
 import re
 
+def add_uris(mpc, uris, size=1024):
+
+    '''
+    add uris to queue; multiple uris are added in command lists of at most
+    `size` commands;
+    '''
+
+    if len(uris) == 1:
+        mpc.add(uris[0])
+        return
+    for i in range(0, len(uris), size):
+        mpc.command_list_ok_begin()
+        for uri in uris[i:i + size]:
+            mpc.add(uri)
+        mpc.command_list_end()
+
+def read_playlist(fp):
+
+    '''
+    read song uris from a playlist file: m3u, m3u8 or a plain list of uris;
+    lines are streamed; empty lines and comments (such as `#EXTINF`) are
+    skipped;
+    '''
+
+    for line in fp:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+def send_commands(mpc, cmds):
+
+    '''
+    send commands in a command list;
+
+    mpd stops a command list at a failed command; commands before it were
+    run, and commands after it are sent again in a new command list;
+
+    ## params
+
+    mpc:mpd.MPDClient
+    :   mpd client;
+
+    cmds:list
+    :   commands as `(name, args)`;
+
+    ## return
+
+    `(results, errors)`: `results` are results of commands, by index; a
+    failed command has result `None`; `errors` are `(index, error)` of failed
+    commands;
+    '''
+
+    results = [ None ] * len(cmds)
+    errors = []
+    iterate = mpc.iterate
+    beg = 0
+    while beg < len(cmds):
+        mpc.command_list_ok_begin()
+        for name, args in cmds[beg:]:
+            getattr(mpc, name)(*args)
+
+        ##  results are read one by one, so that results of commands before a
+        ##  failed one are kept;
+        i = beg
+        mpc.iterate = True
+        try:
+            for result in mpc.command_list_end():
+                results[i] = list(result) if hasattr(result, '__next__') \
+                    else result
+                i += 1
+        except mpd.CommandError as e:
+            ##  error is `[code@index] {command} message`;
+            m = re.match(r'\[\d+@(\d+)\]', str(e))
+            i = beg + int(m.group(1)) if m else i
+            errors.append((i, e))
+            beg = i + 1
+            continue
+        finally:
+            mpc.iterate = iterate
+        break
+    return results, errors
+
 def format_time(tm):
 
     '''
@@ -19,6 +103,45 @@ def format_time(tm):
     else:
         return ''
 
+class LruCache():
+
+    '''
+    a mapping with bounded size; when full, the least recently used item is
+    evicted;
+    '''
+
+    def __init__(self, size):
+        self.size = size
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+    def keys(self):
+        return list(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
 def get_tag(tagname, item):
 
     tag = item.get(tagname)
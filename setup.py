@@ -174,7 +174,7 @@ setup(
     ##  will be installed by pip when this project is installed;
     ##
     install_requires=[
-        'python-mpd2==1.0.0',
+        'python-mpd2>=1.1.0',
         'PyYAML',
     ],
 
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+'''
+test fixtures; fakes they are built of are in `fakes` module;
+'''
+
+import pytest
+
+pytest.importorskip('mpd')
+
+from tests.fakes import make_app
+from tests.fakes import playing
+
+@pytest.fixture
+def server():
+    return playing(50)
+
+@pytest.fixture
+def app(server, monkeypatch):
+    return make_app(monkeypatch, server)
+
+@pytest.fixture
+def fleet(server, monkeypatch):
+
+    '''
+    app with 2 servers; the other server has 20 songs in queue;
+    '''
+
+    return make_app(monkeypatch, server, playing(20))
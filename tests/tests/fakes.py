@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+
+'''
+test fakes: a recording mpd stand-in and a curses-free ncmpy controller;
+
+the stand-in keeps a small in-memory server state and records every command
+sent to it, grouped by round trip, so that tests can put budgets on the
+number of commands, round trips and bytes each user action costs;
+'''
+
+from os.path import dirname
+import curses
+import mpd
+import re
+
+from ncmpy.__main__ import Ncmpy
+from ncmpy.fleet import Server
+
+def _quote(arg):
+
+    '''
+    quote a command argument as mpd protocol does;
+    '''
+
+    if isinstance(arg, (list, tuple)):
+        arg = ':'.join(str(i) for i in arg)
+    arg = str(arg).replace('\\', '\\\\').replace('"', '\\"')
+    return f' "{arg}"'
+
+def _public(song):
+
+    '''
+    strip server-internal fields from a song;
+    '''
+
+    return { k: v for k, v in song.items() if not k.startswith('_') }
+
+def _size(obj):
+
+    '''
+    estimate the size of a response in mpd protocol;
+    '''
+
+    if obj is None:
+        return 3                                ##  `OK\n`;
+    if isinstance(obj, dict):
+        return sum(len(f'{k}: {v}\n') for k, v in obj.items())
+    if isinstance(obj, list):
+        return sum(_size(i) for i in obj)
+    return len(f'value: {obj}\n')
+
+class FakeServer():
+
+    '''
+    in-memory mpd server state with command handlers;
+
+    each handler `cmd_{name}` implements mpd command `name`; the return value
+    mimics what `python-mpd2` returns for it;
+    '''
+
+    def __init__(self, nsongs=100, ndirs=10):
+        self.library = []
+        for i in range(nsongs):
+            self.library.append({
+                'file': f'dir{i % ndirs}/song{i:05d}.mp3',
+                'title': f'title {i}',
+                'artist': f'artist {i % 7}',
+                'album': f'album {i % 13}',
+                'albumartist': f'artist {i % 7}',
+                'time': str(180 + i % 60),
+            })
+        self.queue = []
+        self.next_id = 1
+        self.version = 1
+        self.current = -1
+        self.state = 'stop'
+        self.volume = 50
+        self.stickers = {}
+        self.events = []
+        self.uptime = 100
+        self.db_update = 1500000000
+
+        ##  server is down: connections are refused or lost;
+        self.down = False
+
+        ##  max number of songs in a listing; a larger listing exceeds output
+        ##  buffer and is refused; `None` means no limit;
+        self.max_listed = None
+
+        ##  stored playlists: `{name: [uri, ...]}`, and their last-modified
+        ##  times; `listplaylistinfo` takes a range if `windowed` is set;
+        self.playlists = {}
+        self.pl_mtimes = {}
+        self.windowed = True
+        self.pl_clock = 0
+
+    def enqueue(self, song):
+        self.version += 1
+        song = dict(song, id=str(self.next_id), pos=str(len(self.queue)))
+        song['_ver'] = self.version
+        self.next_id += 1
+        self.queue.append(song)
+        return song['id']
+
+    def restart(self):
+
+        '''
+        restart server; queue is restored with new song ids;
+        '''
+
+        queue, self.queue = self.queue, []
+        self.version = 1
+        self.uptime = 0
+        for song in queue:
+            self.enqueue(_public(song))
+
+    def _renumber(self):
+        self.version += 1
+        for pos, song in enumerate(self.queue):
+            if song['pos'] != str(pos):
+                song['pos'] = str(pos)
+                song['_ver'] = self.version
+
+    def _song(self, uri):
+        for song in self.library:
+            if song['file'] == uri:
+                return song
+        raise mpd.CommandError(f'[50@0] {{add}} No such song: {uri}')
+
+    def cmd_setvol(self, vol):
+        self.volume = int(vol)
+
+    def cmd_status(self):
+        status = {
+            'volume': str(self.volume),
+            'repeat': '0',
+            'random': '0',
+            'single': '0',
+            'consume': '0',
+            'playlist': str(self.version),
+            'playlistlength': str(len(self.queue)),
+            'state': self.state,
+        }
+        if self.current >= 0:
+            song = self.queue[self.current]
+            status['song'] = str(self.current)
+            status['songid'] = song['id']
+            status['time'] = '0:{}'.format(song['time'])
+        return status
+
+    def cmd_stats(self):
+        return {
+            'songs': str(len(self.library)),
+            'artists': '7',
+            'albums': '13',
+            'uptime': str(self.uptime),
+            'playtime': '10',
+            'db_playtime': '1000',
+            'db_update': str(self.db_update),
+        }
+
+    def cmd_ping(self):
+        pass
+
+    def cmd_commands(self):
+        names = {
+            name[len('cmd_'):].split('_')[0] if name.startswith('cmd_sticker_')
+            else name[len('cmd_'):]
+            for name in dir(self) if name.startswith('cmd_')
+        }
+        return sorted(names | { 'idle', 'noidle', 'close' })
+
+    def cmd_currentsong(self):
+        if self.current >= 0:
+            return _public(self.queue[self.current])
+        return {}
+
+    def cmd_playlistinfo(self):
+        return [ _public(song) for song in self.queue ]
+
+    def cmd_plchanges(self, version):
+        return [
+            _public(song) for song in self.queue if song['_ver'] > int(version)
+        ]
+
+    def cmd_playlistfind(self, tag, value):
+        return [ _public(s) for s in self.queue if s.get(tag) == value ]
+
+    def cmd_add(self, uri):
+        if uri == '':
+            for song in self.library:
+                self.enqueue(song)
+        else:
+            self.enqueue(self._song(uri))
+
+    def cmd_addid(self, uri, pos=None):
+        return self.enqueue(self._song(uri))
+
+    def cmd_deleteid(self, id_):
+        self.queue = [ song for song in self.queue if song['id'] != str(id_) ]
+        self._renumber()
+
+    def cmd_swap(self, i, j):
+        self.queue[i], self.queue[j] = self.queue[j], self.queue[i]
+        self._renumber()
+
+    def cmd_delete(self, pos):
+        if isinstance(pos, tuple):
+            del self.queue[pos[0]:pos[1]]
+        else:
+            del self.queue[pos]
+        self._renumber()
+
+    def cmd_move(self, pos, to):
+        beg, end = pos if isinstance(pos, tuple) else (pos, pos + 1)
+        songs = self.queue[beg:end]
+        del self.queue[beg:end]
+        self.queue[to:to] = songs
+        self._renumber()
+
+    def cmd_play(self, pos=0):
+        self.current = int(pos)
+        self.state = 'play'
+
+    def cmd_playid(self, id_):
+        for pos, song in enumerate(self.queue):
+            if song['id'] == str(id_):
+                self.cmd_play(pos)
+
+    def cmd_next(self):
+        self.current = (self.current + 1) % len(self.queue)
+
+    def _listed(self, name, songs):
+        if self.max_listed is not None and len(songs) > self.max_listed:
+            raise mpd.CommandError(
+                '[52@0] {{{}}} Output buffer is full'.format(name))
+
+    def cmd_lsinfo(self, uri=''):
+        items = []
+        dirs = sorted({ dirname(song['file']) for song in self.library })
+        if uri == '':
+            items += [ {'directory': d} for d in dirs ]
+        songs = [
+            dict(song) for song in self.library if dirname(song['file']) == uri
+        ]
+        self._listed('lsinfo', songs)
+        return items + songs
+
+    def cmd_listall(self, uri=''):
+        songs = [
+            song['file'] for song in self.library
+            if uri == '' or song['file'].startswith(uri + '/')
+        ]
+        self._listed('listall', songs)
+        dirs = sorted({ dirname(uri) for uri in songs }) if uri == '' else []
+        return [ { 'directory': d } for d in dirs ] + \
+            [ { 'file': uri } for uri in songs ]
+
+    def cmd_listallinfo(self, uri=''):
+        return [ dict(self._song(uri)) ]
+
+    def _match(self, args):
+        ##  as in mpd, an empty value matches songs without the tag;
+        pairs = list(zip(args[::2], args[1::2]))
+        return [
+            song for song in self.library
+            if all(song.get(k, '') == v for k, v in pairs)
+        ]
+
+    def cmd_list(self, tag, *args):
+        if 'group' in args:
+            i = args.index('group')
+            groups = {}
+            for song in self._match(args[:i]):
+                groups.setdefault(song.get(args[i + 1], ''), set()).add(
+                    song.get(tag, ''))
+            return [
+                { args[i + 1]: k, tag: sorted(v) }
+                for k, v in sorted(groups.items())
+            ]
+        if len(args) == 1:
+            args = ('artist', args[0])
+        return sorted({ song[tag] for song in self._match(args) })
+
+    def cmd_find(self, *args):
+        return [ dict(song) for song in self._match(args) ]
+
+    def cmd_sticker_get(self, type_, uri, name):
+        try:
+            return self.stickers[uri]
+        except KeyError:
+            raise mpd.CommandError('[50@0] {sticker} no such sticker')
+
+    def cmd_sticker_set(self, type_, uri, name, value):
+        self.stickers[uri] = str(value)
+
+    def cmd_sticker_delete(self, type_, uri, name):
+        if self.stickers.pop(uri, None) is None:
+            raise mpd.CommandError('[50@0] {sticker} no such sticker')
+
+    def cmd_sticker_find(self, type_, uri, name):
+        return [ { 'file': f, 'sticker': f'rating={v}' }
+            for f, v in sorted(self.stickers.items()) if f.startswith(uri) ]
+
+    def store(self, name, uris):
+        self.playlists[name] = list(uris)
+        self.pl_clock += 1
+        self.pl_mtimes[name] = '2020-01-01T00:{:02d}:{:02d}Z'.format(
+            *divmod(self.pl_clock, 60))
+
+    def _playlist(self, name):
+        if name not in self.playlists:
+            raise mpd.CommandError('[50@0] {listplaylist} No such playlist')
+        return self.playlists[name]
+
+    def cmd_listplaylists(self):
+        return [ { 'playlist': name, 'last-modified': self.pl_mtimes[name] }
+            for name in self.playlists ]
+
+    def cmd_listplaylist(self, name):
+        return list(self._playlist(name))
+
+    def cmd_listplaylistinfo(self, name, rng=None):
+        uris = self._playlist(name)
+        if rng is not None:
+            if not self.windowed:
+                raise mpd.CommandError(
+                    '[2@0] {listplaylistinfo} too many arguments')
+            uris = uris[rng[0]:rng[1]]
+        return [ dict(self._song(uri)) for uri in uris ]
+
+    def cmd_load(self, name, rng=None):
+        uris = self._playlist(name)
+        if rng is not None:
+            uris = uris[rng[0]:rng[1]]
+        for uri in uris:
+            self.enqueue(self._song(uri))
+
+    def cmd_rm(self, name):
+        self._playlist(name)
+        del self.playlists[name]
+        del self.pl_mtimes[name]
+
+    def cmd_playlistdelete(self, name, pos):
+        uris = self._playlist(name)
+        del uris[pos]
+        self.store(name, uris)
+
+    def cmd_outputs(self):
+        return [{'outputid': '0', 'outputname': 'out', 'outputenabled': '1'}]
+
+class RecordingClient():
+
+    '''
+    recording stand-in for `mpd.MPDClient`;
+
+    every command is logged as `(name, request_bytes, response_bytes)`; the
+    log is a list of round trips, each round trip a list of commands; a
+    command list is a single round trip;
+
+    as in mpd, a failed command in a command list stops the list, and its
+    error is raised at the end of the list, with the index of the command;
+    with `iterate` set, results of a command list are yielded one by one, and
+    the error is raised after results of commands before the failed one;
+    '''
+
+    iterate = False
+
+    def __init__(self, server):
+        self.server = server
+        self.log = []
+        self._command_list = None
+
+    def __getattr__(self, name):
+        handler = getattr(self.server, 'cmd_' + name, None)
+        if handler is None:
+            raise AttributeError(name)
+
+        def call(*args):
+            if self.server.down:
+                raise mpd.ConnectionError('Connection lost while reading line')
+            req = len(name.replace('_', ' ')) + sum(map(len, map(_quote, args)))
+            if self._command_list is not None and self._error is not None:
+                return None
+            try:
+                result = handler(*args)
+            except mpd.CommandError as e:
+                if self._command_list is not None:
+                    self._command_list.append((name, req + 1, len(str(e)) + 5))
+                    self._error = mpd.CommandError(re.sub(
+                        r'@\d+', '@{}'.format(len(self._results)), str(e), 1))
+                    return None
+                self.log.append([ (name, req + 1, len(str(e)) + 5) ])
+                raise
+            entry = (name, req + 1, _size(result))
+            if self._command_list is not None:
+                self._command_list.append(entry)
+                self._results.append(result)
+                return None
+            self.log.append([ entry ])
+            return result
+
+        return call
+
+    def connect(self, host, port):
+        if self.server.down:
+            raise ConnectionRefusedError(111, 'Connection refused')
+
+    def disconnect(self):
+        pass
+
+    def command_list_ok_begin(self):
+        self._command_list = []
+        self._results = []
+        self._error = None
+
+    def command_list_end(self):
+        self.log.append(self._command_list + [ ('command_list', 0, 3) ])
+        self._command_list = None
+        if self.iterate:
+            return self._iter_results(self._results, self._error)
+        if self._error is not None:
+            raise self._error
+        return self._results
+
+    def _iter_results(self, results, error):
+        yield from results
+        if error is not None:
+            raise error
+
+    def send_idle(self):
+        if self.server.down:
+            raise mpd.ConnectionError('Connection lost while reading line')
+        self.log.append([ ('idle', 5, 0) ])
+
+    def noidle(self):
+        if self.server.down:
+            raise mpd.ConnectionError('Connection lost while reading line')
+        events, self.server.events = self.server.events, []
+        self.log.append([ ('noidle', 7, _size(events)) ])
+        return events
+
+    def cost(self):
+
+        '''
+        return `(round_trips, commands, bytes)` of logged commands, not
+        counting `idle`/`noidle`, and clear the log;
+        '''
+
+        trips = [
+            [ c for c in trip if c[0] not in ('idle', 'noidle', 'command_list') ]
+            for trip in self.log
+        ]
+        trips = [ trip for trip in trips if trip ]
+        cmds = [ c for trip in trips for c in trip ]
+        self.log = []
+        return (len(trips), len(cmds), sum(c[1] + c[2] for c in cmds))
+
+    def names(self):
+
+        '''
+        return names of logged commands, not counting `idle`/`noidle`;
+        '''
+
+        return [
+            c[0] for trip in self.log for c in trip
+            if c[0] not in ('idle', 'noidle', 'command_list')
+        ]
+
+class FakeWin():
+
+    '''
+    curses window stand-in; drawing calls are ignored;
+    '''
+
+    def __init__(self, nlines, ncols):
+        self.nlines, self.ncols = nlines, ncols
+
+    def getmaxyx(self):
+        return self.nlines, self.ncols
+
+    def resize(self, nlines, ncols):
+        self.nlines, self.ncols = nlines, ncols
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+class FakeScreen(FakeWin):
+
+    '''
+    main window stand-in; `getch` returns pending keys, then `-1`;
+    '''
+
+    def __init__(self, nlines, ncols):
+        super().__init__(nlines, ncols)
+        self.keys = []
+
+    def getch(self):
+        return self.keys.pop(0) if self.keys else -1
+
+class FakeThread():
+
+    def start(self):
+        pass
+
+class App(Ncmpy):
+
+    '''
+    ncmpy controller wired to a recording client and fake windows;
+    '''
+
+    def __init__(self, stdscr, server, *others):
+        self.server = server
+        self.others = others
+        super().__init__(stdscr)
+
+    def _init_mpd(self):
+        self.servers = []
+        for i, fake in enumerate((self.server,) + self.others):
+            server = Server(f'mpd{i}', 'localhost', 6600 + i)
+            server.mpc = RecordingClient(fake)
+            server.connect()
+            self.servers.append(server)
+        for server in self.servers[1:]:
+            server.enter_idle()
+        self._use_server(self.servers[0])
+
+    def _init_curses(self, stdscr):
+        self.stdscr = stdscr
+        self.height, self.width = self.stdscr.getmaxyx()
+
+    def _init_threads(self):
+        self.lyrics_thread = FakeThread()
+
+    def _init_signals(self):
+        pass
+
+    def _newwin(self, nlines, ncols, begin_y, begin_x):
+        return FakeWin(nlines, ncols)
+
+    def press(self, *keys):
+
+        '''
+        handle key presses, one event per key;
+        '''
+
+        for key in keys:
+            self.stdscr.keys.append(key)
+            self.on_event('stdin')
+
+    def type(self, *keys):
+
+        '''
+        handle key presses typed ahead, all in one event;
+        '''
+
+        self.stdscr.keys += keys
+        self.on_event('stdin')
+
+    def tick(self, *events):
+
+        '''
+        handle an mpd idle event, or a timeout if no subsystem is given;
+        '''
+
+        if events:
+            self.server.events = list(events)
+            self.on_event('mpd')
+        else:
+            self.on_event('timeout')
+
+def playing(nsongs):
+
+    '''
+    return a fake server playing first song of a queue of `nsongs` songs;
+    '''
+
+    server = FakeServer()
+    for song in server.library[:nsongs]:
+        server.enqueue(song)
+    server.current = 0
+    server.state = 'play'
+    return server
+
+def make_app(monkeypatch, *servers):
+
+    '''
+    return an app connected to fake servers, with curses patched out;
+    '''
+
+    for name in [ 'doupdate', 'curs_set', 'echo', 'noecho', 'cbreak',
+            'nocbreak', 'endwin' ]:
+        monkeypatch.setattr(curses, name, lambda *args: None)
+    monkeypatch.setattr(curses, 'color_pair', lambda n: 0)
+    screen = FakeScreen(40, 120)
+    monkeypatch.setattr(curses, 'ungetch', lambda ch: screen.keys.insert(0, ch))
+    app = App(screen, *servers)
+    for server in app.servers:
+        server.mpc.cost()
+    return app
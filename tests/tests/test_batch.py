@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+'''
+test batch mode;
+'''
+
+import io
+
+import pytest
+
+pytest.importorskip('mpd')
+
+from ncmpy import batch
+from ncmpy.batch import parse_line
+from ncmpy.batch import run
+from ncmpy.config import conf
+from tests.fakes import FakeServer
+from tests.fakes import RecordingClient
+
+def test_parse_line():
+    assert parse_line('  # comment') is None
+    assert parse_line('add "dir0/a b.mp3"') == ('add', [ 'dir0/a b.mp3' ])
+    assert parse_line('delete 0:5') == ('delete', [ (0, 5) ])
+    assert parse_line('move 3: 0') == ('move', [ (3,), '0' ])
+    assert parse_line('find title "07:30" # x') == (
+        'find', [ 'title', '07:30' ])
+    assert parse_line("find title '1:' 名前 2:3") == (
+        'find', [ 'title', '1:', '名前', (2, 3) ])
+    assert parse_line('sticker set song x rating 5') == (
+        'sticker_set', [ 'song', 'x', 'rating', '5' ])
+
+def test_run():
+    server = FakeServer()
+    mpc = RecordingClient(server)
+    lines = [ 'add dir{0}/song{0:05d}.mp3\n'.format(i) for i in range(10) ]
+    lines[3] = 'add nosuchsong.mp3\n'
+    lines[5] = 'nosuchcommand\n'
+    lines.append('playlistfind title "title 9"\n')
+    out, err = io.StringIO(), io.StringIO()
+    failed = run(mpc, lines, 4, out, err)
+
+    ##  failed commands are reported by line number; others are run;
+    assert failed == 2
+    assert [ line.split(':')[0] for line in err.getvalue().splitlines() ] == [
+        '4', '6' ]
+    assert len(server.queue) == 8
+    assert 'title: title 9' in out.getvalue().splitlines()
+
+    ##  commands are sent in command lists of bounded size, after allowed
+    ##  commands are listed;
+    assert mpc.log[0][0][0] == 'commands'
+    assert [ len(trip) - 1 for trip in mpc.log[1:] ] == [ 4, 3, 3 ]
+
+def test_run_resume():
+    server = FakeServer()
+    mpc = RecordingClient(server)
+    lines = [ 'add dir0/song00000.mp3' ] * 5
+    lines[1] = 'add nosuchsong.mp3'
+    out, err = io.StringIO(), io.StringIO()
+    assert run(mpc, lines, 100, out, err) == 1
+    assert err.getvalue().startswith('2: [50@1] {add}')
+
+    ##  a failed list is sent again after the failed command;
+    assert [ len(trip) - 1 for trip in mpc.log[1:] ] == [ 2, 3 ]
+    assert len(server.queue) == 4
+
+def test_run_unbatched():
+    server = FakeServer()
+    mpc = RecordingClient(server)
+    mpc.disconnect = mpc.close = mpc.idle = lambda *args: None
+    lines = [ 'disconnect', 'idle', 'close', '_write_line x', 'ping' ]
+    out, err = io.StringIO(), io.StringIO()
+
+    ##  client methods and connection commands are not run;
+    assert run(mpc, lines, 100, out, err) == 4
+    assert [ line.split(':')[0] for line in err.getvalue().splitlines() ] == [
+        '1', '2', '3', '4' ]
+    assert [ c[0] for c in mpc.log[-1] ] == [ 'ping', 'command_list' ]
+
+def test_run_results_before_error():
+    server = FakeServer()
+    mpc = RecordingClient(server)
+    lines = [
+        'playlistfind title "title 1"',
+        'add nosuchsong.mp3',
+        'playlistfind title "title 2"',
+    ]
+    server.enqueue(server.library[1])
+    server.enqueue(server.library[2])
+    out, err = io.StringIO(), io.StringIO()
+    assert run(mpc, lines, 100, out, err) == 1
+
+    ##  results of commands run before a failed one are written;
+    titles = [
+        line for line in out.getvalue().splitlines()
+        if line.startswith('title:')
+    ]
+    assert titles == [ 'title: title 1', 'title: title 2' ]
+
+def test_main_errors(tmp_path, capsys, monkeypatch):
+    assert batch.main(str(tmp_path / 'none')) != 0
+    assert capsys.readouterr().err.startswith('ncmpy: cannot open')
+
+    ##  nothing listens on port 1;
+    monkeypatch.setattr(conf, 'servers', [])
+    monkeypatch.setattr(conf, 'mpd_host', '127.0.0.1')
+    monkeypatch.setattr(conf, 'mpd_port', 1)
+    path = tmp_path / 'cmds'
+    path.write_text('ping\n')
+    assert batch.main(str(path)) != 0
+    assert capsys.readouterr().err.startswith('ncmpy: connection to')
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+'''
+per-action budgets of mpd traffic;
+
+each budget is `(round_trips, commands, bytes)`; an action must not cost
+more than its budget; when an optimization lowers the cost of an action,
+lower its budget too, so that regressions are caught;
+'''
+
+from ncmpy.keysym import keysym as ks
+
+BUDGETS = {
+    'idle_tick'         : (3, 3, 400),
+    'scroll'            : (0, 0, 0),
+    'delete'            : (8, 8, 7300),
+    'switch_pane'       : (4, 4, 600),
+    'play_database'     : (4, 5, 500),
+    'play_queued'       : (4, 4, 450),
+    'track_change'      : (3, 3, 400),
+    'artist_album'      : (4, 5, 1800),
+    'drill_down'        : (13, 13, 2000),
+    'drill_up'          : (6, 6, 800),
+    'database_bounce'   : (10, 10, 2400),
+    'bulk_delete'       : (8, 8, 6000),
+    'block_move'        : (5, 7, 1100),
+    'switch_server'     : (6, 7, 1000),
+    'reconnect'         : (10, 11, 1000),
+    'rate_browse'       : (7, 16, 1300),
+    'auto_queue'        : (8, 9, 1000),
+}
+
+def _check(app, action):
+    cost = app.mpc.cost()
+    budget = BUDGETS[action]
+    assert all(c <= b for c, b in zip(cost, budget)), (action, cost, budget)
+
+def test_idle_tick(app):
+    app.tick()
+    _check(app, 'idle_tick')
+
+def test_scroll(app):
+    app.press(ks.linedn, ks.linedn, ks.pagedn, ks.lineup, ks.last, ks.first)
+    _check(app, 'scroll')
+
+def test_delete(app):
+    ##  delete is sent on next sync, which also refetches changed queue;
+    app.press(ks.delete)
+    app.tick()
+    _check(app, 'delete')
+    assert len(app.server.queue) == 49
+
+def test_switch_pane(app):
+    app.press(ks.panedatabase)
+    _check(app, 'switch_pane')
+
+def test_play_database(app):
+    app.press(ks.panedatabase)
+    app.mpc.cost()
+    ##  enter first dir, select its second song (not in queue) and play;
+    app.press(ks.linedn, ks.play)
+    app.press(ks.linedn, ks.linedn, ks.play)
+    app.mpc.cost()
+    app.press(ks.last, ks.play)
+    _check(app, 'play_database')
+    assert app.server.state == 'play'
+    assert app.server.queue[app.server.current]['file'] == 'dir0/song00090.mp3'
+
+def test_play_queued(app):
+    app.press(ks.panedatabase, ks.linedn, ks.play, ks.linedn, ks.linedn)
+    app.mpc.cost()
+    app.press(ks.play)
+    _check(app, 'play_queued')
+    assert app.server.current == 10
+
+def test_track_change(app):
+    app.tick()
+    app.mpc.cost()
+    app.server.cmd_next()
+    app.tick('player')
+    _check(app, 'track_change')
+
+def test_artist_album(app):
+    app.press(ks.paneartistalbum)
+    _check(app, 'artist_album')
+
+def test_artist_album_fallback(app):
+    ##  songs without album artist are filed under their artist;
+    for song in app.server.library[:7]:
+        del song['albumartist']
+    app.press(ks.paneartistalbum)
+    pane = app.artist_album_pane
+    assert '' not in pane.items
+    app.press(ks.play, ks.play)
+    assert (pane._artist, pane._album) == ('artist 0', 'album 0')
+    assert sorted(song['file'] for song in pane.items) == [
+        app.server.library[0]['file'], app.server.library[91]['file'] ]
+
+def test_drill(app):
+    app.press(ks.paneartistalbum)
+    app.mpc.cost()
+    ##  artist -> album -> song, twice; song list is fetched once;
+    app.press(ks.play, ks.play, ks.parent, ks.play)
+    _check(app, 'drill_down')
+    assert app.artist_album_pane._type == 'song'
+    assert app.artist_album_pane.num > 0
+    ##  going back up costs nothing but the sync of each key press;
+    app.press(ks.parent, ks.parent)
+    _check(app, 'drill_up')
+    assert app.artist_album_pane._type == 'artist'
+
+def test_database_bounce(app):
+    app.press(ks.panedatabase)
+    app.mpc.cost()
+    ##  enter dir1, move down, go back to root, enter dir1 again;
+    app.press(ks.linedn, ks.linedn, ks.play, ks.last, ks.parent, ks.play)
+    _check(app, 'database_bounce')
+    pane = app.database_pane
+    assert pane.dir == 'dir1'
+    assert pane.sel == pane.num - 1
+
+def test_bulk_delete(app):
+    app.press(ks.visual, *[ ks.linedn ] * 9)
+    app.press(ks.delete)
+    app.tick()
+    _check(app, 'bulk_delete')
+    assert len(app.server.queue) == 40
+    assert app.server.queue[0]['title'] == 'title 10'
+
+def test_block_move(app):
+    app.press(ks.linedn, ks.visual, ks.linedn, ks.linedn)
+    app.press(ks.swapdn, ks.swapdn, ks.swapup)
+    app.tick()
+    _check(app, 'block_move')
+    titles = [ song['title'] for song in app.server.queue[:6] ]
+    assert titles == [ 'title 0', 'title 4', 'title 1', 'title 2', 'title 3',
+        'title 5' ]
+    assert [ song['id'] for song in app.queue_pane.queue ] == [
+        song['id'] for song in app.server.queue ]
+
+def test_info(app):
+    ##  hidden info pane doesnt look up database selection;
+    app.press(ks.panedatabase, ks.linedn, ks.play, ks.linedn, ks.linedn)
+    app.tick()
+    assert 'listallinfo' not in app.mpc.names()
+    ##  shown info pane looks up database selection once;
+    app.press(ks.paneinfo)
+    app.tick()
+    app.tick()
+    assert app.mpc.names().count('listallinfo') == 1
+    assert app.info_pane._sid['file'] == app.database_pane.items[2]['file']
+
+def test_info_tags(app):
+    ##  tag change of current song, with the same id, is shown;
+    app.press(ks.paneinfo)
+    assert app.info_pane._cp['title'] == 'title 0'
+    app.server.queue[0]['title'] = 'stream title'
+    app.tick('playlist')
+    assert app.info_pane._cp['title'] == 'stream title'
+
+def test_switch_server(fleet):
+    other = fleet.servers[1]
+    fleet.press(ks.panefleet)
+    fleet.mpc.cost()
+    ##  first switch fetches whole queue of other server;
+    fleet.press(ks.linedn, ks.play)
+    assert fleet.cserver is other
+    assert len(fleet.queue_pane.queue) == 20
+    fleet.mpc.cost()
+    ##  other server changes while not current; its idle event refreshes its
+    ##  cached state only;
+    fleet.press(ks.first, ks.play)
+    other.mpc.cost()
+    other.mpc.server.enqueue(other.mpc.server.library[60])
+    other.mpc.server.events = [ 'playlist' ]
+    fleet.on_server_event(other)
+    assert other.status['playlistlength'] == '21'
+    ##  switching back only fetches queue changes;
+    fleet.press(ks.linedn, ks.play)
+    _check(fleet, 'switch_server')
+    assert [ song['id'] for song in fleet.queue_pane.queue ] == [
+        song['id'] for song in other.mpc.server.queue ]
+    assert 'playlistinfo' not in fleet.mpc.names()
+
+def _drop(app):
+    app.server.down = True
+    app.tick()
+    assert not app.cserver.connected
+    ##  keys which need the server are ignored while disconnected; moving
+    ##  around is not;
+    app.press(ks.linedn, ks.play)
+    assert app.queue_pane.sel == 1
+    assert app.server.current == 0
+    app.press(ks.first)
+    app.server.down = False
+    app.cserver.retry_at = 0
+    app.mpc.cost()
+
+def test_reconnect(app):
+    app.press(ks.panedatabase, ks.panequeue)
+    _drop(app)
+    app.tick()
+    _check(app, 'reconnect')
+    assert app.cserver.connected
+    assert 'playlistinfo' not in app.mpc.names()
+
+def test_reconnect_restart(app):
+    app.press(ks.panedatabase, ks.panequeue)
+    _drop(app)
+    app.server.restart()
+    app.server.db_update += 1
+    app.tick()
+    names = app.mpc.names()
+    assert 'playlistinfo' in names and 'lsinfo' in names
+    assert [ song['id'] for song in app.queue_pane.queue ] == [
+        song['id'] for song in app.server.queue ]
+
+def test_switch_server_down(fleet):
+    other = fleet.servers[1]
+    fleet.server.down = True
+    fleet.tick()
+    assert not fleet.cserver.connected
+    ##  fleet pane and server switch work while current server is down;
+    fleet.press(ks.panefleet, ks.linedn, ks.play)
+    assert fleet.cserver is other
+    assert len(fleet.queue_pane.queue) == 20
+    ##  switching back to server which is down doesnt block;
+    fleet.press(ks.first, ks.play)
+    assert fleet.cserver is fleet.servers[0]
+    assert not fleet.cserver.connected
+
+def test_rate_browse(app):
+    ##  ratings are read from rating index, not one request per song;
+    app.press(ks.panedatabase, ks.linedn, ks.play)
+    app.press(ks.linedn, ks.visual, ks.last)
+    app.mpc.cost()
+    app.press(ks.rate4)
+    app.tick()
+    assert app.mpc.names().count('sticker_set') == 10
+    _check(app, 'rate_browse')
+    assert app.server.stickers == {
+        song['file']: '4' for song in app.server.library[:100:10] }
+    assert app.ratings.top() == sorted(app.server.stickers)
+
+    ##  every sticker event loads rating index again, as it may be caused by
+    ##  another client too;
+    app.server.stickers[app.server.library[1]['file']] = '2'
+    app.tick('sticker')
+    assert app.mpc.names().count('sticker_find') == 1
+    assert app.ratings.get(app.server.library[1]['file']) == 2
+    assert app.ratings.get(app.server.library[0]['file']) == 4
+
+def test_rate_sync(app):
+    ##  rating index is loaded again on sticker events;
+    app.server.stickers['dir0/song00010.mp3'] = '5'
+    app.tick()
+    app.mpc.cost()
+    app.tick('sticker')
+    assert app.mpc.names().count('sticker_find') == 1
+    assert app.ratings.get('dir0/song00010.mp3') == 5
+
+    ##  queue sync doesnt fetch ratings;
+    app.server.enqueue(app.server.library[10])
+    app.tick('playlist')
+    assert 'sticker_get' not in app.mpc.names()
+
+def test_auto_queue(app):
+    app.server.current = 45
+    app.tick()
+    app.press(ks.autoqueue)
+    assert len(app.server.queue) == 56
+    assert app.mpc.names().count('listall') == 1
+    app.tick()
+    app.mpc.cost()
+
+    ##  a played song is replaced in one command list, without listing
+    ##  library or building sampler again;
+    sampler = app.queue_pane._sampler
+    app.server.cmd_next()
+    app.tick('player')
+    app.tick('playlist')
+    _check(app, 'auto_queue')
+    assert len(app.server.queue) == 57
+    assert app.queue_pane._sampler is sampler
+
+def test_auto_queue_database_change(app):
+    app.server.current = 45
+    app.tick()
+    app.press(ks.autoqueue)
+    app.tick()
+
+    ##  sampler is built again after database changes;
+    for song in app.server.library:
+        song['file'] = 'new/' + song['file']
+    app.tick('database')
+    app.server.cmd_next()
+    app.tick('player')
+    assert app.server.queue[-1]['file'].startswith('new/')
+
+    ##  songs missing from a stale library index are skipped, and library is
+    ##  listed again on next top-up;
+    for song in app.server.library:
+        song['file'] = 'newer/' + song['file']
+    app.server.cmd_next()
+    app.tick('player')
+    assert app.message_pane.msg.startswith('Auto-queue skipped')
+    app.server.cmd_next()
+    app.tick('player')
+    assert app.server.queue[-1]['file'].startswith('newer/')
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+'''
+test server transport;
+'''
+
+import socket
+import time
+
+import pytest
+
+pytest.importorskip('mpd')
+
+from ncmpy.config import conf
+from ncmpy.fleet import Server
+from ncmpy.fleet import servers_from_conf
+from tests.fakes import FakeServer
+from tests.fakes import RecordingClient
+
+def test_address(tmp_path):
+    sock = tmp_path / 'socket'
+    server = Server('mpd', 'localhost', 6600, socket_path=str(sock))
+    ##  local server uses tcp if its socket doesnt exist;
+    assert server.address() == ('localhost', 6600)
+    sock.touch()
+    assert server.address() == (str(sock), None)
+    ##  remote server always uses tcp;
+    server.host = 'mpd.example.com'
+    assert server.address() == ('mpd.example.com', 6600)
+    ##  socket path as host;
+    server.host = '/tmp/mpd.sock'
+    assert server.address() == ('/tmp/mpd.sock', None)
+
+def test_servers_from_conf(monkeypatch):
+    monkeypatch.setattr(conf, 'servers', [
+        { 'name': 'a', 'host': 'localhost', 'socket_path': '/tmp/a.sock' },
+        { 'name': 'b', 'host': 'mpd.example.com', 'port': 6601 },
+    ])
+    a, b = servers_from_conf(conf)
+    assert a.socket_path == '/tmp/a.sock'
+    assert b.socket_path == conf.mpd_socket
+    assert (b.host, b.port) == ('mpd.example.com', 6601)
+
+def test_chunk_size():
+    server = Server('mpd', 'localhost', 6600)
+    server.rtt = 0.0001
+    assert server.chunk_size() == 64
+    server.rtt = 0.02
+    assert server.chunk_size() == 1280
+    server.rtt = 1
+    assert server.chunk_size() == 4096
+
+def test_tune():
+    with socket.socket() as lsock:
+        lsock.bind(('127.0.0.1', 0))
+        lsock.listen()
+        with socket.create_connection(lsock.getsockname()) as sock:
+            server = Server('mpd', 'localhost', 6600)
+            server.mpc._sock = sock
+            server._tune()
+            server.mpc._sock = None
+            assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+
+def test_connect_timeout():
+    ##  a server which accepts a connection but never answers is given up
+    ##  after connect timeout, not read timeout;
+    with socket.socket() as lsock:
+        lsock.bind(('127.0.0.1', 0))
+        lsock.listen()
+        host, port = lsock.getsockname()
+        server = Server('mpd', host, port, None, 10, 0.2)
+        t = time.monotonic()
+        assert not server.try_connect()
+        assert time.monotonic() - t < 2
+        assert not server.connected
+
+def test_library_index():
+    fake = FakeServer()
+    uris = { song['file'] for song in fake.library }
+    server = Server('mpd', 'localhost', 6600)
+    server.mpc = RecordingClient(fake)
+    assert server.library_index() == uris
+    assert server.mpc.cost()[0] == 1
+
+    ##  database which exceeds output buffer is listed by directories, in one
+    ##  command list;
+    server.library = None
+    fake.max_listed = 30
+    assert server.library_index() == uris
+    assert server.mpc.names().count('listall') == 11
+    assert server.mpc.cost()[0] == 3
+
+    ##  directory which cant be listed by its entries either;
+    server.library = None
+    fake.max_listed = 5
+    assert server.library_index() is None
+    assert server.library is None
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+'''
+import audit for `ncmpy.__main__`;
+'''
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('mpd')
+
+##  modules that must not be imported before first frame;
+LAZY_MODULES = [
+    'yaml',
+    'ncmpy.ttplyrics',
+    'urllib.request',
+    'xml.dom.minidom',
+    'xml.etree.ElementTree',
+    'ncmpy.lyrics',
+    'json',
+    'random',
+]
+
+def _imported(module):
+
+    '''
+    import a module in a fresh interpreter; return names of all modules
+    imported;
+    '''
+
+    proc = subprocess.run(
+        [
+            sys.executable, '-c',
+            'import sys, {}; print("\\n".join(sys.modules))'.format(module),
+        ],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+    modules = set(proc.stdout.split())
+    assert module in modules
+    return modules
+
+def test_lazy_modules():
+    modules = _imported('ncmpy.__main__')
+    for module in LAZY_MODULES:
+        assert module not in modules, module
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+'''
+test input handling: coalescing, count prefixes and resize;
+'''
+
+import curses
+import signal
+
+from ncmpy.keysym import keysym as ks
+
+def _count_updates(app, monkeypatch):
+    updates = []
+    update = app.update
+    monkeypatch.setattr(app, 'update', lambda: updates.append(update()))
+    return updates
+
+def test_coalesce(app, monkeypatch):
+    updates = _count_updates(app, monkeypatch)
+    app.type(*[ ks.linedn ] * 30, ks.lineup)
+    assert app.queue_pane.sel == 29
+    assert len(updates) == 1
+    assert app.mpc.cost() == (0, 0, 0)
+
+def test_count(app):
+    app.type(*b'20', ks.linedn)
+    assert app.queue_pane.sel == 20
+    app.type(*b'1', ks.lineup, *b'5', ks.lineup)
+    assert app.queue_pane.sel == 14
+    app.type(*b'3', ks.pagedn)
+    assert app.queue_pane.sel == 49
+
+def test_count_move(app):
+    ##  a counted move is a single move command;
+    app.press(ks.linedn, ks.visual, ks.linedn)
+    app.type(*b'5', ks.swapdn)
+    app.tick()
+    assert app.mpc.names().count('move') == 1
+    titles = [ song['title'] for song in app.server.queue[:9] ]
+    assert titles[6:8] == [ 'title 1', 'title 2' ]
+    assert app.queue_pane.selected() == (6, 8)
+
+def test_digits(app, monkeypatch):
+    monkeypatch.setattr('ncmpy.pane.conf.rate_song', True)
+    ##  digits not followed by a count key are key presses of their own;
+    app.type(*b'3')
+    assert 'sticker_set' not in app.mpc.names()
+    app.tick()
+    assert app.server.stickers == { 'dir0/song00000.mp3': '3' }
+    app.type(*b'4', ks.visual)
+    assert app.server.stickers == { 'dir0/song00000.mp3': '4' }
+    assert app.queue_pane.mark == 0
+    ##  `0` doesnt start a count prefix, so it is handled at once;
+    app.type(*b'0')
+    assert app.server.volume == 51
+
+def test_resize(app, monkeypatch):
+    resizes = []
+    resize = app.resize
+    monkeypatch.setattr(app, 'resize', lambda: resizes.append(resize()))
+    ##  a storm of resizes is handled once, after it settles;
+    app.stdscr.resize(30, 100)
+    app.handler(signal.SIGWINCH, None)
+    app.type(ks.linedn, curses.KEY_RESIZE, ks.linedn)
+    app.on_resize()
+    assert resizes == []
+    assert app.queue_pane.sel == 2
+    app.resize_at -= app.resize_delay
+    app.on_resize()
+    app.on_resize()
+    assert len(resizes) == 1
+    assert (app.height, app.width) == (30, 100)
+    assert app.queue_pane.height == 26
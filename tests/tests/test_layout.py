@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+'''
+tests of layout module;
+'''
+
+from ncmpy.layout import fit
+from ncmpy.layout import truncate
+from ncmpy.layout import width
+
+def test_width():
+    assert width('abc') == 3
+    assert width('日本語') == 6
+    assert width('é') == 1
+    assert width('ｆｕｌｌ') == 8
+
+def test_truncate():
+    assert truncate('日本語', 5) == '日本'
+    assert truncate('abc', 5) == 'abc'
+    assert truncate('aéb', 2) == 'aé'
+
+def test_fit():
+    assert fit('日本語', 5) == '日本 '
+    assert width(fit('日本語abc', 7)) == 7
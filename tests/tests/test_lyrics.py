@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+'''
+test lyrics index and lyrics search;
+'''
+
+import os
+
+from ncmpy.config import conf
+from ncmpy.keysym import keysym as ks
+from ncmpy.lyrics import LyricsIndex
+from ncmpy.lyrics import words
+
+def _write(path, name, text, mtime=None):
+    fname = path / name
+    fname.write_text(text, encoding='utf-8')
+    if mtime is not None:
+        os.utime(fname, (mtime, mtime))
+
+def test_words():
+    assert words('[Hello], World! 123') == [ 'hello', 'world', '123' ]
+    assert words('我爱你 la-la') == [ '我', '爱', '你', 'la', 'la' ]
+
+def test_index(tmp_path):
+    _write(tmp_path, 'artist 1 - title 1.lrc',
+        '[ti:Title One]\n[00:01.00]Hello darkness my old friend\n'
+        '[00:05.00][00:09.00]I have come to talk\n', 1000)
+    _write(tmp_path, 'artist 2 - title 2.lrc',
+        '[00:01.00]月亮代表我的心\n[00:04.00]my old friend\n', 1000)
+    index = LyricsIndex(str(tmp_path))
+    index.update()
+    assert index.search('OLD friend') == [
+        ('artist 1', 'Title One', 'Hello darkness my old friend'),
+        ('artist 2', 'title 2', 'my old friend'),
+    ]
+    assert index.search('friend old') == []
+    assert index.search('代表我') == [
+        ('artist 2', 'title 2', '月亮代表我的心') ]
+    assert index.search('timestamps 00') == []
+    ##  lines are not kept in index file;
+    assert 'darkness my old' not in (tmp_path / '.index.json').read_text()
+
+    ##  index is persisted; only changed files are indexed again;
+    _write(tmp_path, 'artist 1 - title 1.lrc', '[00:01.00]Sound of silence')
+    os.remove(tmp_path / 'artist 2 - title 2.lrc')
+    _write(tmp_path, 'artist 3 - title 3.lrc', '[00:01.00]old friend', 1000)
+    index = LyricsIndex(str(tmp_path))
+    indexed = []
+    index_file = index._index
+    index._index = lambda *args: indexed.append(args[0]) or index_file(*args)
+    index.update()
+    assert sorted(indexed) == [ 'artist 1 - title 1.lrc',
+        'artist 3 - title 3.lrc' ]
+    assert index.search('old friend') == [
+        ('artist 3', 'title 3', 'old friend') ]
+    assert '月' not in index.postings
+
+def test_search_lyrics(app, tmp_path, monkeypatch):
+    song = app.server.library[3]
+    _write(tmp_path, '{} - {}.lrc'.format(song['artist'], song['title']),
+        '[00:01.00]Somewhere over the rainbow\n')
+
+    ##  lyrics index is created on first use;
+    assert 'lyrics_index' not in app.__dict__
+    assert isinstance(app.lyrics_index, LyricsIndex)
+    app.lyrics_index = LyricsIndex(str(tmp_path))
+    app.press(ks.panesearch)
+    monkeypatch.setattr(app.message_pane, 'getstr', lambda prompt: 'rainbow')
+    app.press(ks.searchlyrics)
+    assert [ item['file'] for item in app.search_pane.items ] == [
+        song['file'] ]
+    app.press(ks.locate)
+    assert app.cpane is app.database_pane
+    assert app.database_pane.items[app.database_pane.sel]['file'] == \
+        song['file']
+
+def test_save_lyrics_search(app, tmp_path, monkeypatch):
+    ##  song is found by its tags, which its lyrics file name doesnt keep;
+    song = app.server.library[5]
+    song['title'] = 'either/or'
+    monkeypatch.setattr(conf, 'lyrics_dir', str(tmp_path))
+    app.lyrics_index = LyricsIndex(str(tmp_path))
+    app.lyrics_index.update()
+    app.press(ks.panelyrics)
+    app.lyrics_pane.res = {
+        'song': dict(song), 'lyrics': '[00:01.00]Somewhere over the rainbow',
+    }
+    app.press(ks.savelyrics)
+    assert (tmp_path / 'artist 5 - either_or.lrc').exists()
+    app.press(ks.panesearch)
+    monkeypatch.setattr(app.message_pane, 'getstr', lambda prompt: 'rainbow')
+    app.press(ks.searchlyrics)
+    assert [ item['file'] for item in app.search_pane.items ] == [
+        song['file'] ]
+
+def test_save_lyrics_failed(app, tmp_path, monkeypatch):
+    ##  a local file error is reported, and doesnt drop the connection;
+    (tmp_path / 'file').write_text('')
+    monkeypatch.setattr(conf, 'lyrics_dir', str(tmp_path / 'file' / 'lyrics'))
+    app.press(ks.panelyrics)
+    app.lyrics_pane.res = {
+        'song': app.server.library[0], 'lyrics': '[00:01.00]la',
+    }
+    app.mpc.cost()
+    app.press(ks.savelyrics)
+    assert app.cserver.connected
+    assert app.message_pane.msg.startswith('Lyrics saving failed')
+    assert 'playlistinfo' not in app.mpc.names()
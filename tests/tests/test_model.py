@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+'''
+tests of model module;
+'''
+
+import random
+
+from ncmpy.model import Fenwick
+from ncmpy.model import QueueModel
+from ncmpy.model import RatingIndex
+from ncmpy.model import Sampler
+from ncmpy.model import Song
+from ncmpy.model import memory_usage
+from ncmpy.model import to_songs
+
+from tests.fakes import FakeServer
+
+def _check(model, server):
+    assert [ s['id'] for s in model ] == [ s['id'] for s in server.queue ]
+    for pos, song in enumerate(server.queue):
+        assert model.pos_of_id(song['id']) == pos
+        assert pos in model.positions(song['file'])
+    files = { song['file'] for song in server.queue }
+    for song in server.library:
+        assert (song['file'] in model) == (song['file'] in files)
+        if song['file'] in files:
+            assert model.find_pos(song['file']) == min(
+                i for i, s in enumerate(server.queue)
+                if s['file'] == song['file'])
+
+def test_queue_sync():
+    rng = random.Random(0)
+    server = FakeServer(nsongs=30)
+    for song in server.library[:20]:
+        server.enqueue(song)
+    model = QueueModel()
+    model.reset(server.cmd_playlistinfo())
+    ver = server.version
+
+    for _ in range(200):
+        n = len(server.queue)
+        op = rng.choice([ 'add', 'delete', 'swap', 'move' ])
+        if op == 'add' or n < 2:
+            server.enqueue(rng.choice(server.library))
+        elif op == 'delete':
+            server.cmd_delete(rng.randrange(n))
+        elif op == 'swap':
+            server.cmd_swap(rng.randrange(n), rng.randrange(n))
+        elif op == 'move':
+            beg = rng.randrange(n)
+            end = rng.randrange(beg, n) + 1
+            server.cmd_move((beg, end), rng.randrange(n - (end - beg) + 1))
+
+        if rng.random() < 0.3:
+            model.sync(server.cmd_plchanges(ver), len(server.queue))
+            ver = server.version
+            _check(model, server)
+
+def test_queue_edit():
+    server = FakeServer(nsongs=10)
+    for song in server.library + server.library[:3]:
+        server.enqueue(song)
+    model = QueueModel()
+    model.reset(server.cmd_playlistinfo())
+    model.delete(4)
+    server.cmd_delete(4)
+    model.swap(0, 7)
+    server.cmd_swap(0, 7)
+    _check(model, server)
+    assert model.positions(server.library[1]['file']) == [ 1, 10 ]
+
+def _check_durations(model):
+    durs = [ int(song['time']) for song in model ]
+    assert model.total() == sum(durs)
+    for pos in range(len(durs)):
+        assert model.start_of(pos) == sum(durs[:pos])
+
+def test_fenwick():
+    rng = random.Random(1)
+    values = [ rng.randrange(10) for _ in range(50) ]
+    tree = Fenwick(values[:20])
+    for value in values[20:]:
+        tree.append(value)
+    for _ in range(100):
+        i = rng.randrange(50)
+        delta = rng.randrange(5)
+        values[i] += delta
+        tree.add(i, delta)
+    for i in range(51):
+        assert tree.prefix(i) == sum(values[:i])
+    for k in range(sum(values)):
+        i = tree.search(k)
+        assert tree.prefix(i) <= k < tree.prefix(i + 1)
+
+def test_queue_durations():
+    rng = random.Random(2)
+    server = FakeServer(nsongs=30)
+    for song in server.library[:20]:
+        server.enqueue(song)
+    model = QueueModel()
+    model.reset(server.cmd_playlistinfo())
+    ver = server.version
+    for _ in range(300):
+        n = len(model)
+        op = rng.choice([ 'add', 'delete', 'swap', 'move' ])
+        if op == 'add' or n < 2:
+            server.enqueue(rng.choice(server.library))
+            model.sync(server.cmd_plchanges(ver), len(server.queue))
+        elif op == 'delete':
+            beg = rng.randrange(n)
+            end = rng.randrange(beg, min(n, beg + 3)) + 1
+            model.delete(beg, end)
+            server.cmd_delete((beg, end))
+        elif op == 'swap':
+            i, j = rng.randrange(n), rng.randrange(n)
+            model.swap(i, j)
+            server.cmd_swap(i, j)
+        elif op == 'move':
+            beg = rng.randrange(n)
+            end = rng.randrange(beg, n) + 1
+            to = rng.randrange(n - (end - beg) + 1)
+            model.move(beg, end, to)
+            server.cmd_move((beg, end), to)
+        ver = server.version
+        _check_durations(model)
+
+def test_rating_index():
+    index = RatingIndex()
+    assert index.stale
+    index.reset([
+        { 'file': 'a', 'sticker': 'rating=3' },
+        { 'file': 'b', 'sticker': 'rating=5' },
+        { 'file': 'c', 'sticker': 'rating=0' },
+        { 'file': 'd', 'sticker': 'rating=x' },
+        { 'file': 'e', 'sticker': 'rating=3' },
+    ])
+    assert not index.stale
+    assert len(index) == 3
+    assert index.top() == [ 'b', 'a', 'e' ]
+    index.set('a', 0)
+    index.set('c', 4)
+    assert index.get('a') == 0
+    assert index.top() == [ 'b', 'c', 'e' ]
+
+def test_sampler():
+    rng = random.Random(3)
+    weights = [ 0, 1, 2, 4, 8, 16, 32, 1 ]
+    sampler = Sampler(weights)
+    counts = [ 0 ] * len(weights)
+    n = 100000
+    for _ in range(n):
+        counts[sampler.draw(rng)] += 1
+    assert counts[0] == 0
+    for w, c in zip(weights, counts):
+        assert abs(c / n - w / sum(weights)) < 0.01
+    assert len(Sampler([])) == 0
+
+def test_song():
+    item = {
+        'file': 'a.mp3', 'id': '1', 'artist': 'x', 'genre': [ 'g', 'h' ],
+        'last-modified': '2020-01-01T00:00:00Z',
+    }
+    song = Song(item)
+    assert song == item
+    assert song['file'] == 'a.mp3'
+    assert song.get('album') is None
+    assert song.get('last-modified') == item['last-modified']
+    assert 'artist' in song and 'album' not in song
+    assert 'rating' not in song
+    song['rating'] = 3
+    assert song['rating'] == 3 and 'rating' in song
+    try:
+        song['album']
+        assert False
+    except KeyError:
+        pass
+
+    ##  shared tag values are interned;
+    items = [
+        { 'file': str(i), 'artist': ''.join([ 'arti', 'st' ]) }
+        for i in range(100)
+    ]
+    songs = to_songs(items)
+    assert len({ id(song['artist']) for song in songs }) == 1
+    assert memory_usage(songs) < memory_usage(items)
+
+def test_song_sync():
+    server = FakeServer(nsongs=10)
+    for song in server.library:
+        server.enqueue(song)
+    model = QueueModel()
+    model.reset(to_songs(server.cmd_playlistinfo()))
+    moved = model[2]['id']
+    ver = server.version
+    server.cmd_move((2, 3), 0)
+    server.cmd_delete(5)
+    model.sync(to_songs(server.cmd_plchanges(ver)), len(server.queue))
+    _check(model, server)
+    assert isinstance(model[0], Song) and model[0]['id'] == moved
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+'''
+test playlist import;
+'''
+
+from ncmpy.keysym import keysym as ks
+
+def _write_playlist(tmp_path, server):
+    lines = [ '#EXTM3U' ]
+    for i in range(200):
+        lines.append('#EXTINF:180,artist - title {}'.format(i))
+        lines.append(server.library[i % 100]['file'])
+        lines.append('')
+    lines += [ 'nosuch.mp3', 'http://radio.example/stream' ]
+    path = tmp_path / 'a.m3u'
+    path.write_text('\n'.join(lines))
+    return str(path)
+
+def _import(app, monkeypatch, path):
+    monkeypatch.setattr(app.message_pane, 'getstr', lambda prompt: path)
+    app.press(ks.importpl)
+    msgs = []
+    while app.jobs:
+        app.tick()
+        msgs.append(app.message_pane.msg)
+    return msgs
+
+def test_import(app, server, monkeypatch, tmp_path):
+    path = _write_playlist(tmp_path, server)
+    app.mpc.cost()
+    msgs = _import(app, monkeypatch, path)
+    assert len(server.queue) == 250
+    assert len(app.queue_pane.queue) == 250
+    assert msgs[-1] == 'Imported a.m3u: 200 added, 2 skipped'
+
+    ##  library is listed once; songs are added in command lists of bounded
+    ##  size, one per step; uris not in library are not sent;
+    names = app.mpc.names()
+    assert names.count('listall') == 1
+    lists = [
+        [ cmd[0] for cmd in trip ] for trip in app.mpc.log
+        if trip[-1][0] == 'command_list' and trip[0][0] == 'addid'
+    ]
+    assert [ len(cmds) - 1 for cmds in lists ] == [ 64, 64, 64, 9 ]
+    assert 'nosuch.mp3' not in str(app.mpc.log)
+
+def test_import_unlisted(app, server, monkeypatch, tmp_path):
+    ##  without library index, mpd rejects unknown uris; the rest of their
+    ##  command list is sent again;
+    server.max_listed = 0
+    path = _write_playlist(tmp_path, server)
+    msgs = _import(app, monkeypatch, path)
+    assert len(server.queue) == 250
+    assert msgs[-1] == 'Imported a.m3u: 200 added, 2 skipped'
+
+def test_import_missing(app, monkeypatch, tmp_path):
+    msgs = _import(app, monkeypatch, str(tmp_path / 'none.m3u'))
+    assert msgs[-1] == 'Cannot import none.m3u: No such file or directory'
+    assert app.jobs == []
+
+def _stored(server):
+    uris = [ song['file'] for song in server.library ] * 10
+    server.store('big', uris)
+    server.store('small', uris[:3])
+    return uris
+
+def test_playlist_pane(app, server):
+    _stored(server)
+    app.press(ks.paneplaylist)
+    pane = app.playlist_pane
+    assert [ pl['playlist'] for pl in pane.items ] == [ 'big', 'small' ]
+    app.mpc.cost()
+
+    ##  opening a playlist lists uris, then fetches tags of the shown block;
+    app.press(ks.play)
+    assert pane.num == 1000
+    assert app.mpc.names()[-2:] == [ 'listplaylist', 'listplaylistinfo' ]
+    assert app.mpc.log[-1][0][2] < 256 * 300
+    app.tick()
+    app.mpc.cost()
+
+    ##  scrolling is local; next block is fetched on next sync;
+    app.type(*b'1', ks.pagedn)
+    app.type(*b'7', ks.pagedn)
+    assert 'listplaylistinfo' not in app.mpc.names()
+    app.tick()
+    assert app.mpc.names().count('listplaylistinfo') == 1
+    assert pane._song(pane.beg)['file'] == server.library[pane.beg % 100]['file']
+
+    ##  unchanged playlist is opened from cache;
+    app.press(ks.parent, ks.play)
+    assert 'listplaylist' not in app.mpc.names()
+
+    ##  changed playlist is listed again;
+    server.store('big', server.playlists['big'][:10])
+    app.tick()
+    app.tick('stored_playlist')
+    assert app.mpc.names().count('listplaylists') == 1
+    assert pane.num == 10
+    assert len(pane._cache) == 1
+
+def test_playlist_old_server(app, server):
+    ##  a server without ranged `listplaylistinfo` sends all tags at once;
+    server.windowed = False
+    _stored(server)
+    app.press(ks.paneplaylist, ks.play, ks.pagedn, ks.pagedn)
+    assert app.mpc.names().count('listplaylistinfo') == 2
+    assert len(app.playlist_pane._blocks) == 4
+
+def test_playlist_add(app, server):
+    uris = _stored(server)
+    app.press(ks.paneplaylist, ks.play, ks.linedn, ks.visual, ks.linedn)
+    app.mpc.cost()
+    app.press(ks.add)
+    assert app.mpc.names()[-1:] == [ 'load' ]
+    assert app.mpc.names().count('load') == 1
+    assert [ song['file'] for song in server.queue[50:] ] == uris[1:3]
+
+def test_playlist_delete_twice(app, server):
+    uris = _stored(server)
+    mtime = server.pl_mtimes['small']
+    app.press(ks.paneplaylist, ks.linedn, ks.play, ks.last)
+    ##  last-modified time is kept when edited twice in a second, so contents
+    ##  are not taken from cache after an edit;
+    for i in range(2):
+        app.press(ks.delete)
+        server.pl_mtimes['small'] = mtime
+        app.tick()
+        app.tick('stored_playlist')
+    assert server.playlists['small'] == uris[:1]
+    assert app.playlist_pane.items == uris[:1]
+    assert app.message_pane.msg is None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+'''
+test ttplyrics client against canned responses served locally;
+'''
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from io import BytesIO
+from threading import Thread
+from urllib.parse import parse_qs
+
+import pytest
+
+from ncmpy import ttplyrics
+
+def _code_func_ref(Id, data):
+
+    '''
+    reference implementation of `CodeFunc`, as it was before bulk reads;
+    '''
+
+    length = len(data)
+    tmp2 = 0
+    tmp3 = 0
+    tmp1 = (Id & 0x0000FF00) >> 8
+    if (Id & 0x00FF0000) == 0:
+        tmp3 = 0x000000FF & ~tmp1
+    else:
+        tmp3 = 0x000000FF & ((Id & 0x00FF0000) >> 16)
+    tmp3 = tmp3 | ((0x000000FF & Id) << 8)
+    tmp3 = tmp3 << 8
+    tmp3 = tmp3 | (0x000000FF & tmp1)
+    tmp3 = tmp3 << 8
+    if (Id & 0xFF000000) == 0:
+        tmp3 = tmp3 | (0x000000FF & (~Id))
+    else:
+        tmp3 = tmp3 | (0x000000FF & (Id >> 24))
+    i = length - 1
+    while i >= 0:
+        char = data[i]
+        if char >= 0x80:
+            char = char - 0x100
+        tmp1 = (char + tmp2) & 0xFFFFFFFF
+        tmp2 = (tmp2 << (i % 2 + 4)) & 0xFFFFFFFF
+        tmp2 = (tmp1 + tmp2) & 0xFFFFFFFF
+        i -= 1
+    i = 0
+    tmp1 = 0
+    while i <= length - 1:
+        char = data[i]
+        if char >= 128:
+            char = char - 256
+        tmp7 = (char + tmp1) & 0xFFFFFFFF
+        tmp1 = (tmp1 << (i % 2 + 3)) & 0xFFFFFFFF
+        tmp1 = (tmp1 + tmp7) & 0xFFFFFFFF
+        i += 1
+    tmp1 = (((((tmp2 ^ tmp3) & 0xFFFFFFFF) + (tmp1 | Id)) & 0xFFFFFFFF) *
+        (tmp1 | tmp3)) & 0xFFFFFFFF
+    tmp1 = (tmp1 * (tmp2 ^ Id)) & 0xFFFFFFFF
+    if tmp1 > 0x80000000:
+        tmp1 = tmp1 - 0x100000000
+    return tmp1
+
+SEARCH = '''<?xml version="1.0" encoding="UTF-8"?>
+<result>
+<lrc id="11" artist="Someone Else" title="Song"></lrc>
+<lrc id="12" artist="Artist" title="Song"></lrc>
+<lrc id="13" artist="Artist" title="Song (Live)"></lrc>
+</result>
+'''
+
+class Handler(BaseHTTPRequestHandler):
+
+    ##  `{id: lyrics}`; candidates not listed have empty lyrics;
+    lyrics = {}
+
+    ##  requests received: `[(kind, params)]`;
+    log = []
+
+    def do_GET(self):
+        _, kind, query = self.path.split('?', 2)
+        params = { k: v[0] for k, v in parse_qs(query).items() }
+        self.log.append((kind, params))
+        if kind == 'sh':
+            body = SEARCH.encode('utf-8')
+        else:
+            body = self.lyrics.get(int(params['Id']), '').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    Handler.lyrics = {}
+    Handler.log = []
+    monkeypatch.setattr(ttplyrics, 'server',
+        'http://127.0.0.1:{}/dll/lyricsvr.dll'.format(httpd.server_port))
+    yield Handler
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_code_func():
+    cases = [
+        (0, b''),
+        (12, 'ArtistSong'.encode('utf-8')),
+        (0x01185F, '周杰伦晴天'.encode('utf-8')),
+        (0xFF00FF00, bytes(range(256))),
+        (0x80000001, b'\x80\xff\x7f\x00' * 33),
+    ]
+    for Id, data in cases:
+        assert ttplyrics.CodeFunc(Id, data) == _code_func_ref(Id, data)
+
+def test_encode():
+    assert ttplyrics.EncodeArtTit('ab') == '61006200'
+    assert ttplyrics.EncodeArtTit('周') == '6854'
+    assert ttplyrics.EncodeArtTit('') == ''
+
+def test_parse_candidates(monkeypatch):
+    ##  tiny reads, so that elements span chunks;
+    monkeypatch.setattr(ttplyrics, 'read_size', 7)
+    assert ttplyrics.parse_candidates(BytesIO(SEARCH.encode('utf-8'))) == [
+        (11, 'Someone Else', 'Song'),
+        (12, 'Artist', 'Song'),
+        (13, 'Artist', 'Song (Live)'),
+    ]
+
+def test_fetch(server):
+    server.lyrics = { 11: '[00:01.00]other', 12: '[00:01.00]la la' }
+    assert ttplyrics.fetch_lyrics('Artist', 'Song') == '[00:01.00]la la'
+
+    ##  search by normalized artist and title; exact match is tried first;
+    kind, params = server.log[0]
+    assert kind == 'sh'
+    assert params['Artist'] == ttplyrics.EncodeArtTit('artist')
+    assert params['Title'] == ttplyrics.EncodeArtTit('song')
+    kind, params = server.log[1]
+    assert kind == 'dl' and params['Id'] == '12'
+    assert int(params['Code']) == _code_func_ref(12, b'ArtistSong')
+
+def test_fetch_next_candidate(server):
+    ##  candidates without lyrics are skipped;
+    server.lyrics = { 13: '[00:01.00]live' }
+    assert ttplyrics.fetch_lyrics('Artist', 'Song') == '[00:01.00]live'
+    assert [ p['Id'] for k, p in server.log[1:] ] == [ '12', '11', '13' ]
+
+def test_fetch_not_found(server, monkeypatch):
+    monkeypatch.setattr(ttplyrics, 'max_candidates', 2)
+    server.lyrics = { 13: '[00:01.00]live' }
+    assert ttplyrics.fetch_lyrics('Artist', 'Song') == \
+        '[00:00.00]Lyrics not found.'
+    assert len(server.log) == 3
+
+def test_fetch_failed(monkeypatch):
+    monkeypatch.setattr(ttplyrics, 'server', 'http://127.0.0.1:1/')
+    assert ttplyrics.fetch_lyrics('Artist', 'Song') == \
+        '[00:00.00]Lyrics fetching failed.'